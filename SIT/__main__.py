@@ -1,10 +1,5 @@
 import argparse
 from . import __version__
-from .tool.generate.analyze_sbom import build_bom
-from .tool.convert.convert_sbom import Convert_SBOM
-from .tool.export.export_sbom import Export_SBOM
-from .tool.merge.merge_sbom import Merge_SBOM
-from .tool.util.utils import Util
 
 
 def get_input() -> argparse.Namespace:
@@ -59,6 +54,18 @@ def get_input() -> argparse.Namespace:
         default="middleware",
         help="SBOM Model, choose from SPDX, CycloneDX, OSSBOM or middleware, default is middleware"
     )
+    generate_parser.add_argument(
+        "--compact",
+        action="store_true",
+        dest="compact",
+        help="Write the SBOM without indentation and whitespace"
+    )
+    generate_parser.add_argument(
+        "--legacy-json",
+        action="store_true",
+        dest="legacy_json",
+        help="Write the SBOM with the json module as in earlier versions, non-ASCII characters are escaped"
+    )
     generate_parser.add_argument(
         "--env", 
         metavar="<ENVIRONMENT>",
@@ -67,6 +74,53 @@ def get_input() -> argparse.Namespace:
         default="",
         help="Running environment of software package, default is None"
     )
+    generate_parser.add_argument(
+        "-j", "--jobs",
+        metavar="<JOBS>",
+        type=int,
+        dest="jobs",
+        default=1,
+        help="Number of worker processes used to analyze files and installed packages, default is 1"
+    )
+    generate_parser.add_argument(
+        "--cache-dir",
+        metavar="<CACHE_DIR>",
+        type=str,
+        dest="cache_dir",
+        default=None,
+        help="Directory of the scancode and installed package analysis cache, default is ~/.cache/sit"
+    )
+    generate_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Do not read or write the scancode and installed package analysis cache"
+    )
+    generate_parser.add_argument(
+        "--since",
+        metavar="<PREVIOUS_SBOM>",
+        type=str,
+        dest="since",
+        default=None,
+        help="Previous middleware SBOM of the package, only files changed since then are re-analyzed"
+    )
+    generate_parser.add_argument(
+        "--index-url",
+        metavar="<INDEX_URL>",
+        type=str,
+        dest="index_url",
+        default="https://pypi.org/pypi",
+        help="Base URL of the PyPI JSON API used to complete package metadata, default is https://pypi.org/pypi"
+    )
+    generate_parser.add_argument(
+        "--metadata-source",
+        metavar="<SOURCE>",
+        type=str,
+        dest="metadata_source",
+        default="online",
+        help="Source of package metadata, 'online' or 'offline:<PATH>' for a local snapshot of PyPI JSON \
+            metadata (a directory of <name>.json files or a SQLite file), default is online"
+    )
     
     # subcommand: merge SBOM
     merge_parser = subparsers.add_parser(
@@ -78,10 +132,10 @@ def get_input() -> argparse.Namespace:
         metavar="<INPUT>", 
         type=str, 
         dest="input",
-        nargs=2,
+        nargs="+",
         required=True,
-        help="Input path of SBOMs to be merged, 2 SBOMs are required. The first one is the \
-            root SBOM and the second one is sub-SBOM, currently only support json format",
+        help="Input path of SBOMs to be merged, at least 2 SBOMs are required. The first one is the \
+            root SBOM and the others are sub-SBOMs merged in order, currently only support json format",
     )
     merge_parser.add_argument(
         "-o", "--output",
@@ -100,6 +154,26 @@ def get_input() -> argparse.Namespace:
         default="middleware",
         help="SBOM Model, choose from SPDX, CycloneDX, OSSBOM or middleware, default is middleware"
     )
+    merge_parser.add_argument(
+        "-j", "--jobs",
+        metavar="<JOBS>",
+        type=int,
+        dest="jobs",
+        default=1,
+        help="Number of worker processes used to load SBOMs, default is 1"
+    )
+    merge_parser.add_argument(
+        "--compact",
+        action="store_true",
+        dest="compact",
+        help="Write the SBOM without indentation and whitespace"
+    )
+    merge_parser.add_argument(
+        "--legacy-json",
+        action="store_true",
+        dest="legacy_json",
+        help="Write the SBOM with the json module as in earlier versions, non-ASCII characters are escaped"
+    )
     
     # subcommand: export SBOM
     export_parser = subparsers.add_parser(
@@ -119,18 +193,43 @@ def get_input() -> argparse.Namespace:
         metavar="<OUTPUT>", 
         type=str, 
         dest="output",
-        default="-",
-        help="Output file path of SBOM, default is stdout"
+        default=None,
+        help="Output file path of SBOM, default is stdout, not allowed with --id-file"
     )
-    export_parser.add_argument(
+    export_ids = export_parser.add_mutually_exclusive_group(required=True)
+    export_ids.add_argument(
         "--id",
         metavar="<ID>",
         type=str,
         dest="id",
-        required=True,
         nargs="+",
         help="ID of the top-level Component to be exported",
     )
+    export_ids.add_argument(
+        "--id-file",
+        metavar="<ID_FILE>",
+        type=str,
+        dest="id_file",
+        default=None,
+        help="File with one top-level Component ID per line, each of them is exported to its own \
+            file in the output directory",
+    )
+    export_parser.add_argument(
+        "--output-dir",
+        metavar="<OUTPUT_DIR>",
+        type=str,
+        dest="output_dir",
+        default=".",
+        help="Output directory of the SBOMs exported with --id-file, default is the current directory"
+    )
+    export_parser.add_argument(
+        "-j", "--jobs",
+        metavar="<JOBS>",
+        type=int,
+        dest="jobs",
+        default=1,
+        help="Number of worker processes used to write the SBOMs exported with --id-file, default is 1"
+    )
     export_parser.add_argument(
         "--model", 
         metavar="<MODEL>", 
@@ -140,6 +239,18 @@ def get_input() -> argparse.Namespace:
         default="middleware",
         help="SBOM Model, choose from SPDX, CycloneDX, OSSBOM or middleware, default is middleware"
     )
+    export_parser.add_argument(
+        "--compact",
+        action="store_true",
+        dest="compact",
+        help="Write the SBOM without indentation and whitespace"
+    )
+    export_parser.add_argument(
+        "--legacy-json",
+        action="store_true",
+        dest="legacy_json",
+        help="Write the SBOM with the json module as in earlier versions, non-ASCII characters are escaped"
+    )
     
     # subcommand: convert SBOM
     convert_parser = subparsers.add_parser(
@@ -171,8 +282,26 @@ def get_input() -> argparse.Namespace:
         default="middleware",
         help="SBOM Model, choose from SPDX, CycloneDX, OSSBOM or middleware, default is middleware"
     )
+    convert_parser.add_argument(
+        "--compact",
+        action="store_true",
+        dest="compact",
+        help="Write the SBOM without indentation and whitespace"
+    )
+    convert_parser.add_argument(
+        "--legacy-json",
+        action="store_true",
+        dest="legacy_json",
+        help="Write the SBOM with the json module as in earlier versions, non-ASCII characters are escaped"
+    )
     
     args = parser.parse_args()
+    if args.subcmd == "export":
+        # the SBOMs of --id-file go to --output-dir, one file per ID
+        if args.id_file and args.output is not None:
+            parser.error("argument -o/--output: not allowed with argument --id-file, use --output-dir")
+        if args.output is None:
+            args.output = "-"
     return args
 
 
@@ -200,18 +329,32 @@ if __name__ == "__main__":
         from .server.server import app
         uvicorn.run(app, host="0.0.0.0", port=9020)
     else:
+        # each subcommand imports only the modules it needs, to keep start-up fast
         if args.subcmd == "generate":
-            bom = build_bom(args.input, args.env)
+            from .tool.generate.analyze_sbom import build_bom
+            bom = build_bom(args.input, args.env, args.jobs, args.cache_dir, not args.no_cache, args.since, args.index_url, args.metadata_source)
         elif args.subcmd == "merge":
-            bom = Merge_SBOM(args.input).merge_sbom()
+            from .tool.merge.merge_sbom import Merge_SBOM
+            bom = Merge_SBOM(args.input, args.jobs).merge_sbom()
         elif args.subcmd == "export":
-            bom = Export_SBOM(args.input, args.id).export_sbom()
+            from .tool.export.export_sbom import Export_SBOM, read_id_file
+            if args.id_file:
+                outputs = Export_SBOM(args.input, read_id_file(args.id_file)).export_batch(
+                    args.output_dir, args.model, None if args.compact else 4, args.jobs, args.legacy_json
+                )
+                logging.info(f"Exported {len(outputs)} SBOMs to {args.output_dir}")
+                bom = None
+            else:
+                bom = Export_SBOM(args.input, args.id).export_sbom()
         elif args.subcmd == "convert":
+            from .tool.convert.convert_sbom import Convert_SBOM
             bom = Convert_SBOM(args.input).convert_sbom()
         else:
             raise Exception("No command is provided")
         
-        Util.make_output(bom, args.model, args.output)
+        if bom is not None:
+            from .tool.util.utils import Util
+            Util.make_output(bom, args.model, args.output, None if args.compact else 4, args.legacy_json)
     logging.info("Successful Operation!")
 
 
@@ -3,6 +3,8 @@
 
 from .middleware import Middleware, Component, Licensing, CrossRef, Service, Signer, Signature, ReleaseNotes, Relationship, Hash, Annotation, License, Individual, Extension, ExternalReference, Issue, Note, Text, Swid
 from ..schema import cdx_model
+from ..tool.util.bom_reader import RawBOM, validate_document
+from .enum_lookup import enum_values, enum_value_set, to_enum
 from typing import Union, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
@@ -12,13 +14,14 @@ import validators
 import re
 
 class Cdx2Middleware:
-    def __init__(self, cdx_bom: dict) -> None:
-        if cdx_bom.get("specVersion") != "1.6":
+    def __init__(self, cdx_bom: Union[dict, RawBOM]) -> None:
+        # the version of a RawBOM was already checked by sniff_format
+        if not isinstance(cdx_bom, RawBOM) and cdx_bom.get("specVersion") != "1.6":
             raise ValueError("Only support CycloneDX 1.6 version")
         self.cdx_bom = cdx_bom
 
     def cdx2middleware(self) -> Middleware:
-        bom = cdx_model.CyclonedxBillOfMaterialsStandard(**self.cdx_bom)
+        bom = validate_document(cdx_model.CyclonedxBillOfMaterialsStandard, self.cdx_bom)
         bom_license = None
         timestamp = None
         lfc = None
@@ -608,6 +611,14 @@ class Middleware2Cdx:
         self.midware = midware
         
     def middleware2cdx(self) -> dict:
+        return self.middleware2cdx_model().model_dump(mode='json', by_alias=True, exclude_none=True)
+
+    def middleware2cdx_json(self, indent: Optional[int] = None) -> bytes:
+        # serialized by pydantic-core straight to bytes, without the intermediate dict
+        bom = self.middleware2cdx_model()
+        return bom.__pydantic_serializer__.to_json(bom, indent=indent, by_alias=True, exclude_none=True)
+
+    def middleware2cdx_model(self) -> cdx_model.CyclonedxBillOfMaterialsStandard:
         bom = cdx_model.CyclonedxBillOfMaterialsStandard(
             bomFormat=cdx_model.BomFormat.CycloneDX,
             specVersion="1.6",
@@ -617,10 +628,10 @@ class Middleware2Cdx:
         lfc = []
         if self.midware.lifecycles:
             for lfcycle in self.midware.lifecycles:
-                if lfcycle in [member.value for member in cdx_model.Phase]:
+                if lfcycle in enum_value_set(cdx_model.Phase):
                     lfc.append(
                         cdx_model.Lifecycles(
-                            phase=cdx_model.Phase(lfcycle)
+                            phase=to_enum(cdx_model.Phase, lfcycle)
                         )
                     )
                 else:
@@ -698,7 +709,8 @@ class Middleware2Cdx:
         depend_dic = {}
         dependencies = []
         properties = []
-        remove_rels = []
+        # bom-refs of the components nested into others by CONTAINS
+        nested_refs = set()
         if self.midware.relationship:
             for rel in self.midware.relationship:
                 if rel.type == "DEPENDS_ON":
@@ -757,7 +769,7 @@ class Middleware2Cdx:
                     if not source_comp.components:
                         source_comp.components = []
                     source_comp.components.append(target_comp)
-                    remove_rels.append(target_comp)
+                    nested_refs.add(target_id)
                 else:
                     rel_value = f"{rel.sourceID} is {rel.type} of {rel.targetID}"
                     if rel.comment:
@@ -769,9 +781,11 @@ class Middleware2Cdx:
                         )
                     )
         
-        for rel in remove_rels:
-            if rel in bom_comps:
-                bom_comps.remove(rel)
+        if nested_refs:
+            bom_comps = [
+                comp for comp in bom_comps
+                if not (comp.bom_ref and comp.bom_ref.root in nested_refs and comp_dic[comp.bom_ref.root] is comp)
+            ]
         
         for source, target in depend_dic.items():
             dependencies.append(
@@ -863,7 +877,7 @@ class Middleware2Cdx:
         bom.annotations = annotations if annotations else None
         bom.properties = properties if properties else None
         bom.signature = self.signature_mid2cdx(self.midware.signature)
-        return bom.model_dump(mode='json', by_alias=True, exclude_none=True)
+        return bom
 
 
     
@@ -872,17 +886,17 @@ class Middleware2Cdx:
             return None
         checksum = []
         for hash_checksum in hashes:
-            if hash_checksum.alg in [member.value for member in cdx_model.HashAlg]:
+            if hash_checksum.alg in enum_value_set(cdx_model.HashAlg):
                 checksum.append(
                     cdx_model.Hash(
-                        alg=cdx_model.HashAlg(hash_checksum.alg),
+                        alg=to_enum(cdx_model.HashAlg, hash_checksum.alg),
                         content=cdx_model.HashContent(root=hash_checksum.value)
                     )
                 )
-            elif f"{hash_checksum.alg[:3]}-{hash_checksum.alg[3:]}" in [member.value for member in cdx_model.HashAlg]:
+            elif f"{hash_checksum.alg[:3]}-{hash_checksum.alg[3:]}" in enum_value_set(cdx_model.HashAlg):
                 checksum.append(
                     cdx_model.Hash(
-                        alg=cdx_model.HashAlg(f"{hash_checksum.alg[:3]}-{hash_checksum.alg[3:]}"),
+                        alg=to_enum(cdx_model.HashAlg, f"{hash_checksum.alg[:3]}-{hash_checksum.alg[3:]}"),
                         content=cdx_model.HashContent(root=hash_checksum.value)
                     )
                 )
@@ -895,8 +909,8 @@ class Middleware2Cdx:
             return None
         ex_refs = []
         for ref in exRefs:
-            if ref.type in [member.value for member in cdx_model.Type3]:
-                ref_type = cdx_model.Type3(ref.type)
+            if ref.type in enum_value_set(cdx_model.Type3):
+                ref_type = to_enum(cdx_model.Type3, ref.type)
             elif validators.url(ref.type):
                 ref_type = pydantic.AnyUrl(ref.type)
             else:
@@ -930,7 +944,7 @@ class Middleware2Cdx:
 
     def signer_mid2cdx(self, signer: Optional[Signer]) -> Optional[cdx_model.Signer]:
         return cdx_model.Signer(
-            algorithm=cdx_model.Algorithm(signer.algorithm) if signer.algorithm in [member.value for member in cdx_model.Algorithm] else pydantic.AnyUrl(signer.algorithm),
+            algorithm=to_enum(cdx_model.Algorithm, signer.algorithm) if signer.algorithm in enum_value_set(cdx_model.Algorithm) else pydantic.AnyUrl(signer.algorithm),
             keyId=signer.keyId,
             publicKey=cdx_model.PublicKey(kty=cdx_model.KeyType(signer.publicKey)) if signer.publicKey else None,
             certificatePath=signer.certificatePath,
@@ -1146,12 +1160,12 @@ class Middleware2Cdx:
                 )
             
             # License1
-            if lic.spdxID in [member.value for member in cdx_model.spdx.Schema]:
+            if lic.spdxID in enum_value_set(cdx_model.spdx.Schema):
                 root_license = cdx_model.License1(
-                    id=cdx_model.spdx.Schema(lic.spdxID),
+                    id=to_enum(cdx_model.spdx.Schema, lic.spdxID),
                     name=lic_name if lic_name else None,
                     bom_ref=lic_ref,
-                    acknowledgement=cdx_model.LicenseAcknowledgementEnumeration(lic.type) if lic.type in [member.value for member in cdx_model.LicenseAcknowledgementEnumeration] else None,
+                    acknowledgement=to_enum(cdx_model.LicenseAcknowledgementEnumeration, lic.type),
                     text=text,
                     url=url,
                     licensing=licensing,
@@ -1169,7 +1183,7 @@ class Middleware2Cdx:
                 bom_license.append(
                     cdx_model.LicenseChoiceItem1(
                         expression=lic.spdxID,
-                        acknowledgement=cdx_model.LicenseAcknowledgementEnumeration(lic.type) if lic.type in [member.value for member in cdx_model.LicenseAcknowledgementEnumeration] else None,
+                        acknowledgement=to_enum(cdx_model.LicenseAcknowledgementEnumeration, lic.type),
                         bom_ref=cdx_model.RefType(root=lic.name) if lic.name else None
                     )
                 )
@@ -1188,7 +1202,7 @@ class Middleware2Cdx:
                 root_license = cdx_model.License2(
                     name=lic_name,
                     bom_ref=lic_ref,
-                    acknowledgement=cdx_model.LicenseAcknowledgementEnumeration(lic.type) if lic.type in [member.value for member in cdx_model.LicenseAcknowledgementEnumeration] else None,
+                    acknowledgement=to_enum(cdx_model.LicenseAcknowledgementEnumeration, lic.type),
                     text=text,
                     url=url,
                     licensing=licensing,
@@ -1231,7 +1245,7 @@ class Middleware2Cdx:
             for note in releaseNotes.notes:
                 notes.append(
                     cdx_model.Note(
-                        locale=cdx_model.LocaleType(root=note.locale) if note.locale in [member.value for member in cdx_model.LocaleType] else None,
+                        locale=cdx_model.LocaleType(root=note.locale) if note.locale and re.fullmatch(r'([a-z]{2})(-[A-Z]{2})?', note.locale) else None,
                         text=cdx_model.Attachment(
                             content=note.text.content,
                             contentType=note.text.contentType,
@@ -1261,9 +1275,9 @@ class Middleware2Cdx:
             type_str = comp.type.lower().replace("_", "-").split(":")[-1]
         else:
             type_str = "application"
-        for type_enum in [member.value for member in cdx_model.Type]:
+        for type_enum in enum_values(cdx_model.Type):
             if type_enum in type_str:
-                bom_type = cdx_model.Type(type_enum)
+                bom_type = to_enum(cdx_model.Type, type_enum)
                 break
         
         manufacturer = None
@@ -1397,7 +1411,7 @@ class Middleware2Cdx:
             name=comp.name,
             version=cdx_model.Version(root=comp.version) if comp.version else None,
             description=comp.description,
-            scope=cdx_model.Scope(comp.scope) if comp.scope in [member.value for member in cdx_model.Scope] else None,
+            scope=to_enum(cdx_model.Scope, comp.scope),
             hashes=self.hash_mid2cdx(comp.checksum),
             licenses=self.license_mid2cdx(comp.licenses),
             copyright=comp.copyright if comp.copyright and comp.copyright != "NOASSERTION" else None,
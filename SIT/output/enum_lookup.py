@@ -0,0 +1,29 @@
+from enum import Enum
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, Optional, Tuple, Type
+import functools
+
+
+# lookup tables of the schema enums (HashAlg, RelationshipType, the SPDX license list, ...),
+# built once per enum on first use instead of listing the members on every call
+
+
+@functools.lru_cache(maxsize=None)
+def enum_values(enum: Type[Enum]) -> Tuple:
+    # member values in definition order, for the lookups that match by prefix or substring
+    return tuple(member.value for member in enum)
+
+
+@functools.lru_cache(maxsize=None)
+def enum_value_set(enum: Type[Enum]) -> FrozenSet:
+    return frozenset(enum_values(enum))
+
+
+@functools.lru_cache(maxsize=None)
+def enum_members(enum: Type[Enum]) -> Mapping:
+    return MappingProxyType({member.value: member for member in enum})
+
+
+def to_enum(enum: Type[Enum], value, default: Optional[Enum] = None) -> Optional[Enum]:
+    # enum(value) if value is one of the member values, default otherwise
+    return enum_members(enum).get(value, default)
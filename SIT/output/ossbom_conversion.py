@@ -3,19 +3,22 @@
 
 from .middleware import Middleware, Component, SnippetScope, SnippetPointer, Service, CrossRef, Relationship, Hash, Annotation, License, Individual, Extension, ExternalReference, Text
 from ..schema import ossbom_model
+from ..tool.util.bom_reader import RawBOM, validate_document
+from .enum_lookup import enum_value_set
 from ..schema.cdx_model.spdx import Schema
 from typing import Optional, List, Union
 from .spdx_conversion import Spdx2Middleware, Middleware2Spdx
 
 
 class Ossbom2Middleware:
-    def __init__(self, ossbom: dict) -> None:
-        if ossbom.get("DocumentInformation", {}).get("DocumentVersion", None) != "1.0":
+    def __init__(self, ossbom: Union[dict, RawBOM]) -> None:
+        # the version of a RawBOM was already checked by sniff_format
+        if not isinstance(ossbom, RawBOM) and ossbom.get("DocumentInformation", {}).get("DocumentVersion", None) != "1.0":
             raise Exception("Only support OSSBOM version 1.0")
         self.ossbom = ossbom
     
     def ossbom2middleware(self) -> Middleware:
-        bom = ossbom_model.OSSBOM(**self.ossbom)
+        bom = validate_document(ossbom_model.OSSBOM, self.ossbom)
         
         license_info = {}
         if bom.OtherLicensingInformation:
@@ -213,7 +216,7 @@ class Ossbom2Middleware:
         if not license:
             return None
         info = license_info.get(license, None)
-        if license in [member.value for member in Schema]:
+        if license in enum_value_set(Schema):
             lic = License(
                 type="declared",
                 spdxID=license
@@ -254,6 +257,14 @@ class Middleware2Ossbom:
         self.midware = midware
     
     def middleware2ossbom(self) -> dict:
+        return self.middleware2ossbom_model().model_dump(mode='json', exclude_none=True)
+
+    def middleware2ossbom_json(self, indent: Optional[int] = None) -> bytes:
+        # serialized by pydantic-core straight to bytes, without the intermediate dict
+        bom = self.middleware2ossbom_model()
+        return bom.__pydantic_serializer__.to_json(bom, indent=indent, exclude_none=True)
+
+    def middleware2ossbom_model(self) -> ossbom_model.OSSBOM:
         doc_info = ossbom_model.DocumentInfo(
             DocumentFormat="OSSBOM",
             DocumentName=self.midware.doc_name,
@@ -421,7 +432,7 @@ class Middleware2Ossbom:
             OtherLicensingInformation=licenses if licenses else None,
             Annotation=annotations if annotations else None
         )
-        return bom.model_dump(mode='json', exclude_none=True)
+        return bom
     
     def properties_midware2ossbom(self, properties: Optional[List[Extension]]) -> Optional[List[ossbom_model.Property]]:
         if not properties:
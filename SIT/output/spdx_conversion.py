@@ -6,17 +6,20 @@ from typing import Union, List, Optional
 import copy
 from .middleware import Middleware, Component, Service, CrossRef, Text, Relationship, Hash, Annotation, License, Individual, Extension, ExternalReference, SnippetPointer, SnippetScope
 from ..schema import spdx_model
+from ..tool.util.bom_reader import RawBOM, validate_document
+from .enum_lookup import enum_values, enum_value_set, to_enum
 from ..schema.cdx_model.spdx import Schema
 
 
 class Spdx2Middleware:
-    def __init__(self, spdx_bom: dict) -> None:
+    def __init__(self, spdx_bom: Union[dict, RawBOM]) -> None:
         self.spdx_bom = spdx_bom
-        if spdx_bom["spdxVersion"] != "SPDX-2.3":
+        # the version of a RawBOM was already checked by sniff_format
+        if not isinstance(spdx_bom, RawBOM) and spdx_bom["spdxVersion"] != "SPDX-2.3":
             raise ValueError("Only support SPDX 2.3 version")
 
     def spdx2middleware(self) -> Middleware:
-        bom = spdx_model.Spdx23(**self.spdx_bom)
+        bom = validate_document(spdx_model.Spdx23, self.spdx_bom)
         midware = Middleware(
             doc_ID=bom.SPDXID,
             doc_name=bom.name,
@@ -629,7 +632,7 @@ class Spdx2Middleware:
             )
 
     def make_License_object(self, license_string: str) -> License:
-        if license_string in [member.value for member in Schema]:
+        if license_string in enum_value_set(Schema):
             return License(spdxID=license_string)
         else:
             return License(name=license_string)
@@ -675,6 +678,14 @@ class Middleware2Spdx:
         self.midware = midware
 
     def middleware2spdx(self) -> dict:
+        return self.middleware2spdx_model().model_dump(mode='json', by_alias=True, exclude_none=True)
+
+    def middleware2spdx_json(self, indent: Optional[int] = None) -> bytes:
+        # serialized by pydantic-core straight to bytes, without the intermediate dict
+        bom = self.middleware2spdx_model()
+        return bom.__pydantic_serializer__.to_json(bom, indent=indent, by_alias=True, exclude_none=True)
+
+    def middleware2spdx_model(self) -> spdx_model.Spdx23:
         data_license = []
         for lic in self.midware.licenses:
             if lic.spdxID:
@@ -707,7 +718,7 @@ class Middleware2Spdx:
                 if len(anno.subjects) == 0:
                     bom_annotations.append(
                         spdx_model.Annotation(
-                            annotationType=anno.type.upper() if anno.type.upper() in [member.value for member in spdx_model.AnnotationType] else spdx_model.AnnotationType.OTHER,
+                            annotationType=anno.type.upper() if anno.type.upper() in enum_value_set(spdx_model.AnnotationType) else spdx_model.AnnotationType.OTHER,
                             annotationDate=anno.timestamp,
                             annotator=Middleware2Spdx.individual2str([anno.annotator])[0],
                             comment=anno.text
@@ -940,14 +951,14 @@ class Middleware2Spdx:
                     if comp.external_references:
                         for ref in comp.external_references:
                             ref_cat = ref.type.split("(")[0]
-                            if not ref_cat in [member.value for member in spdx_model.ReferenceCategory]:
+                            if not ref_cat in enum_value_set(spdx_model.ReferenceCategory):
                                 ref_cat = "OTHER"
                             ref_type = ref.type.split("(")[1].strip().strip(")") if len(ref.type.split("(")) > 1 else None
                             if not ref_type:
                                 ref_type = "OTHER"
                             external_pkg_refs.append(
                                 spdx_model.ExternalRef(
-                                    referenceCategory=spdx_model.ReferenceCategory(ref_cat),
+                                    referenceCategory=to_enum(spdx_model.ReferenceCategory, ref_cat),
                                     referenceLocator=ref.url,
                                     referenceType=ref_type,
                                     comment=ref.comment
@@ -971,7 +982,7 @@ class Middleware2Spdx:
                     
                     primaryPkgPurpose = None
                     type_str = comp.type.split(":")
-                    if len(type_str) > 1 and type_str[1].strip() in [member.value for member in spdx_model.PrimaryPackagePurpose]:
+                    if len(type_str) > 1 and type_str[1].strip() in enum_value_set(spdx_model.PrimaryPackagePurpose):
                         primaryPkgPurpose = spdx_model.PrimaryPackagePurpose(comp.type.split(":")[1].strip())
                     
                     pkgFileName = None
@@ -1045,8 +1056,8 @@ class Middleware2Spdx:
                     if comp.type:
                         type_str = comp.type.strip("File: ")
                         for one_type in type_str.split(", "):
-                            if one_type in [member.value for member in spdx_model.FileType]:
-                                file_types.append(spdx_model.FileType(one_type))
+                            if one_type in enum_value_set(spdx_model.FileType):
+                                file_types.append(to_enum(spdx_model.FileType, one_type))
                             else:
                                 file_types.append(spdx_model.FileType.OTHER)
                     
@@ -1125,12 +1136,8 @@ class Middleware2Spdx:
         relationships = []
         if self.midware.relationship:
             for relation in self.midware.relationship:
-                spdx_relation_type = None
                 relation_type = relation.type.upper().replace("-", "_")
-                if relation_type in [member.value for member in spdx_model.RelationshipType]: 
-                    spdx_relation_type = spdx_model.RelationshipType(relation_type)
-                else:
-                    spdx_relation_type = spdx_model.RelationshipType.OTHER
+                spdx_relation_type = to_enum(spdx_model.RelationshipType, relation_type, spdx_model.RelationshipType.OTHER)
                 
                 relationships.append(
                     spdx_model.Relationship(
@@ -1146,7 +1153,7 @@ class Middleware2Spdx:
         bom.snippets = snippets if snippets else None
         bom.relationships = relationships if relationships else None
         bom.hasExtractedLicensingInfos = licenses if licenses else None
-        return bom.model_dump(mode='json', by_alias=True, exclude_none=True)
+        return bom
 
     @staticmethod
     def match_property(key: str, extensions: Optional[List[Extension]]) -> Optional[List[str]]:
@@ -1191,14 +1198,14 @@ class Middleware2Spdx:
             return None
         checksums = []
         for cs in checksum:
-            if cs.alg in [member.value for member in spdx_model.Algorithm]:
+            if cs.alg in enum_value_set(spdx_model.Algorithm):
                 checksums.append(
                     spdx_model.Checksum(
                         algorithm=spdx_model.Algorithm(cs.alg.upper().replace("_", "-")),
                         checksumValue=cs.value
                     )
                 )
-            elif cs.alg.upper().replace("-", "") in [member.value for member in spdx_model.Algorithm]:
+            elif cs.alg.upper().replace("-", "") in enum_value_set(spdx_model.Algorithm):
                 checksums.append(
                     spdx_model.Checksum(
                         algorithm=spdx_model.Algorithm(cs.alg.upper().replace("-", "")),
@@ -1217,10 +1224,10 @@ class Middleware2Spdx:
         elif comp.type.startswith("Snippet"):
             return "Snippet"
         else:
-            for pkg_type in [member.value for member in spdx_model.PrimaryPackagePurpose]:
+            for pkg_type in enum_values(spdx_model.PrimaryPackagePurpose):
                 if pkg_type.lower() in comp.type.lower():
                     return "Package"
-            for file_type in [member.value for member in spdx_model.FileType]:
+            for file_type in enum_values(spdx_model.FileType):
                 if file_type.lower() in comp.type.lower():
                     return "File"
             return "Package"
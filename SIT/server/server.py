@@ -39,14 +39,20 @@ def generate_sbom(
     input: str = Query(...), 
     output: Optional[str] = Query(None), 
     model: Literal["spdx", "cyclonedx", "ossbom", "middleware"] = Query("middleware"),
-    env: Optional[str] = Query(None)
+    env: Optional[str] = Query(None),
+    jobs: int = Query(1, ge=1),
+    cache_dir: Optional[str] = Query(None),
+    no_cache: bool = Query(False),
+    since: Optional[str] = Query(None),
+    index_url: str = Query("https://pypi.org/pypi"),
+    metadata_source: str = Query("online"),
+    legacy_json: bool = Query(False)
 ) -> Response:
-    bom = build_bom(input, env)
+    bom = build_bom(input, env, jobs, cache_dir, not no_cache, since, index_url, metadata_source)
     res = Response(message="SBOM generated successfully! ")
     if output:
-        Util.make_output(bom, model, output)
+        res.hash = Util.make_output(bom, model, output, legacy_json=legacy_json)
         res.message += f"Save SBOM to {output}"
-        res.hash = Util.toHash(output)
 
     res.sbom = Util.convert2model(bom, model)
     return res
@@ -54,16 +60,17 @@ def generate_sbom(
 
 @app.get("/merge", status_code=200)
 def merge_sbom(
-    input: List[str] = Query(..., min_length=2, max_length=2), 
+    input: List[str] = Query(..., min_length=2), 
     output: Optional[str] = Query(None), 
     model: Literal["spdx", "cyclonedx", "ossbom", "middleware"] = Query("middleware"),
+    jobs: int = Query(1, ge=1),
+    legacy_json: bool = Query(False),
 ):
-    bom = Merge_SBOM(input).merge_sbom()
+    bom = Merge_SBOM(input, jobs).merge_sbom()
     res = Response(message="SBOM merged successfully! ")
     if output:
-        Util.make_output(bom, model, output)
+        res.hash = Util.make_output(bom, model, output, legacy_json=legacy_json)
         res.message += f"Save SBOM to {output}"
-        res.hash = Util.toHash(output)
     
     res.sbom = Util.convert2model(bom, model)
     return res
@@ -75,13 +82,13 @@ def export_sbom(
     output: Optional[str] = Query(None), 
     model: Literal["spdx", "cyclonedx", "ossbom", "middleware"] = Query("middleware"),
     id: List[str] = Query(...),
+    legacy_json: bool = Query(False),
 ):
     bom = Export_SBOM(input, id).export_sbom()
     res = Response(message="SBOM exported successfully! ")
     if output:
-        Util.make_output(bom, model, output)
+        res.hash = Util.make_output(bom, model, output, legacy_json=legacy_json)
         res.message += f"Save SBOM to {output}"
-        res.hash = Util.toHash(output)
     
     res.sbom = Util.convert2model(bom, model)
     return res
@@ -92,13 +99,13 @@ def convert_sbom(
     input: str = Query(...), 
     output: Optional[str] = Query(None), 
     model: Literal["spdx", "cyclonedx", "ossbom", "middleware"] = Query("middleware"),
+    legacy_json: bool = Query(False),
 ):
     bom = Convert_SBOM(input).convert_sbom()
     res = Response(message="SBOM converted successfully! ")
     if output:
-        Util.make_output(bom, model, output)
+        res.hash = Util.make_output(bom, model, output, legacy_json=legacy_json)
         res.message += f"Save SBOM to {output}"
-        res.hash = Util.toHash(output)
     
     res.sbom = Util.convert2model(bom, model)
     return res
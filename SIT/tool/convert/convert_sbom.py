@@ -1,4 +1,3 @@
-import json
 from ...output import middleware
 from ..util.utils import Util
 
@@ -8,7 +7,6 @@ class Convert_SBOM:
         self.input = input
 
     def convert_sbom(self) -> middleware.Middleware:
-        bom = json.load(open(self.input, "r"))
-        midware = Util.choose_model(bom)
+        midware = Util.load_model(self.input)
         # json.dump(midware.model_dump(mode='json', by_alias=True, exclude_none=True), open("/home/jcg/test/result/convert.json", "w"), indent=4, ensure_ascii=False)
         return midware
\ No newline at end of file
@@ -1,64 +1,133 @@
-from typing import List
-import json
+from typing import Dict, List, Optional
+import os
+import re
 from uuid import uuid4
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from packageurl import PackageURL
 from ...output import middleware
-from ..util.utils import Util
+from ..util.utils import Util, RelationshipGraph
+from ..util.bom_reader import read_bom
+
+
+def read_id_file(path: str) -> List[str]:
+    # one component ID per line, blank lines and lines starting with # are ignored
+    ids = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                ids.append(line)
+    return ids
+
+
+def output_file_names(ids: List[str]) -> List[str]:
+    # file names derived from the component IDs, e.g. pkg:pypi/foo@1.0 -> pkg_pypi_foo_1.0.json
+    names = []
+    used = set()
+    for comp_id in ids:
+        base = re.sub(r"[^A-Za-z0-9._-]+", "_", comp_id).strip("_.") or "component"
+        name = f"{base}.json"
+        i = 1
+        while name in used:
+            name = f"{base}-{i}.json"
+            i += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+# state of a batch export, set once in every worker process
+_batch = {}
+
+
+def init_batch(
+    midware: middleware.Middleware,
+    graph: RelationshipGraph,
+    model: str,
+    indent: Optional[int],
+    legacy_json: bool = False
+) -> None:
+    # graph is built once, with its dependency graph, and shared by the closures of all the IDs
+    _batch["midware"] = midware
+    _batch["graph"] = graph
+    _batch["model"] = model
+    _batch["indent"] = indent
+    _batch["legacy_json"] = legacy_json
+
+
+def export_to_file(comp_id: str, output: str) -> Optional[str]:
+    bom = Export_SBOM.export_midware(_batch["midware"], _batch["graph"], [comp_id])
+    return Util.make_output(bom, _batch["model"], output, _batch["indent"], _batch["legacy_json"])
 
 
 class Export_SBOM:
     def __init__(self, input: str, id: List[str]) -> None:
         self.input = input
         self.id = id
-    
-    def export_sbom(self) -> middleware.Middleware:
+
+    def load(self) -> middleware.Middleware:
         try:
-            bom = json.load(open(self.input, "r"))
+            bom = read_bom(self.input)
         except:
             raise Exception("Only JSON format is supported for exporting SBOMs")
-        
+
         midware = Util.choose_model(bom)
-        comp_ls = [comp.ID for comp in midware.components]
+        comp_ls = set(comp.ID for comp in midware.components)
         for comp_id in self.id:
             if not comp_id in comp_ls:
                 raise Exception(f"Component {comp_id} not found in SBOM")
-        
-        root_comp, dep_tree = Util.construct_dep_tree(midware.relationship)
-        exported_comps = set()
-        exported_rels = []
-        comp_que = self.id
-        while comp_que:
-            cur = comp_que.pop(0)
-            exported_comps.add(cur)
-            deps = dep_tree.get(cur, [])
-            comp_que.extend(deps)
-            exported_comps.update(deps)
-        
-        if midware.relationship:
-            for rel in midware.relationship:
-                if rel.type == "DEPENDS_ON" or rel.type == "DEPENDENCY_OF":
-                    if rel.sourceID in exported_comps and rel.targetID in exported_comps:
-                        exported_rels.append(rel)
-                else:
-                    if rel.type in Util.SOURCE2TARGET:
-                        if rel.sourceID in exported_comps:
-                            exported_comps.add(rel.targetID)
-                            exported_rels.append(rel)
-                    elif rel.type in Util.TARGET2SOURCE:
-                        if rel.targetID in exported_comps:
-                            exported_comps.add(rel.sourceID)
-                            exported_rels.append(rel)
-            
+        return midware
+
+    def export_sbom(self) -> middleware.Middleware:
+        midware = self.load()
+        return self.export_midware(midware, RelationshipGraph(midware.relationship), self.id)
+
+    def export_batch(
+        self,
+        output_dir: str,
+        model: str = "middleware",
+        indent: Optional[int] = 4,
+        jobs: int = 1,
+        legacy_json: bool = False
+    ) -> Dict[str, str]:
+        # every ID in self.id is exported to its own file in output_dir, the input is loaded and
+        # indexed once and the sub-SBOMs are built and written by a pool of worker processes
+        midware = self.load()
+        graph = RelationshipGraph(midware.relationship)
+        # the dependency graph is built before the workers start, so they all get the same one
+        graph.dep_graph
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = [os.path.join(output_dir, name) for name in output_file_names(self.id)]
+        initargs = (midware, graph, model, indent, legacy_json)
+        if jobs <= 1 or len(self.id) <= 1:
+            init_batch(*initargs)
+            for comp_id, output in zip(self.id, outputs):
+                export_to_file(comp_id, output)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_batch, initargs=initargs) as executor:
+                list(executor.map(export_to_file, self.id, outputs))
+        return dict(zip(self.id, outputs))
+
+    @staticmethod
+    def export_midware(
+        midware: middleware.Middleware,
+        graph: RelationshipGraph,
+        ids: List[str]
+    ) -> middleware.Middleware:
+        # the input document is left untouched, so it can be shared by several exports
+        exported_comps, exported_rels = graph.export(ids)
+
+        midware = midware.model_copy()
         midware.components = [comp for comp in midware.components if comp.ID in exported_comps]
         midware.relationship = exported_rels
-        
+
         midware.doc_ID = f"urn:uuid:{uuid4()}"
         midware.doc_name = f"{midware.doc_name}(exported)"
         midware.timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-        
+
         purl = PackageURL(type = "github", namespace = "https://github.com/gmscofield/", name = "SIT", version = "1.0").to_string()
-        creator = midware.creator if midware.creator else []
+        creator = list(midware.creator) if midware.creator else []
         if not "SIT" in [cr.name for cr in creator]:
             creator.append(
                 middleware.Component(
@@ -75,5 +144,5 @@ class Export_SBOM:
                 )
             )
         midware.creator = creator
-        
+
         return midware
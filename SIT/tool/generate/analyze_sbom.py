@@ -1,19 +1,21 @@
 import os
-import requests
 from packageurl import PackageURL
-import pandas as pd
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
 from datetime import datetime
 import logging
-from scancode.api import get_licenses
 
 from .meta.pypi import analyze_pyproject_meta, analyze_requirements_meta, analyze_setup_meta, \
     analyze_pipfile_meta, analyze_pipfileLock_meta, analyze_pdm_meta, analyze_poetry_meta
 from .meta.conda import analyze_metayaml_meta, analyze_condayml_meta, analyze_environmentyaml_meta
 from .meta.utils import component_meta_template, name_email_str2ind, IDManager, normalize_pkgname, \
     is_py_file, pyfile_depends, is_valid_purl, get_imports, str2license, get_deps_from_pip
-from .meta.parse_pyfile import analyze_pyfile_meta, copyright_from_pkgfile
-from ...output import middleware, cdx_conversion, spdx_conversion, ossbom_conversion
+from .meta.parse_pyfile import reuse_pyfile_meta, copyright_from_pkgfile, index_pyfile_meta
+from .meta.scan_cache import configure_scan_cache, scan_cache_args, scan_licenses, file_sha256
+from .meta.dist_cache import package_dir_key, load_package_dir, save_package_dir
+from .meta.metadata_source import OnlineMetadataSource, OfflineMetadataSource, get_metadata_source, DEFAULT_INDEX_URL
+from ...output import middleware
+from ..util.bom_reader import read_bom
+from ..util.utils import Util, RelationshipIndex
 
 
 METAFILE2FUNC = {
@@ -34,6 +36,10 @@ METAFILE2FUNC = {
 
 LICENSE_LIST_VERSION = "3.23"
 
+# directory listings and previous file components of the source files analyzed by build_bom,
+# set once in every process so the per-file jobs only carry the directory and the file name
+_source_context = {}
+
 
 def merge_component(component1: Optional[middleware.Component], component2: Optional[middleware.Component]) -> Optional[middleware.Component]:
     if not component1:
@@ -147,24 +153,17 @@ def merge_component(component1: Optional[middleware.Component], component2: Opti
     return merged_comp
 
 
-def req_pypi(pkg_name: Optional[str]) -> Optional[dict]:
-    if not pkg_name:
-        return None
-    url = f"https://pypi.org/pypi/{pkg_name}/json"
-    proxies = {
-        "http_proxy": "socks5://127.0.0.1:7890", 
-        "https_proxy": "socks5://127.0.0.1:7890"
-    }
-    try:
-        response = requests.get(url, proxies = proxies)
-    except:
-        response = requests.get(url)
+def req_pypi(pkg_names: List[str], source: Union[OnlineMetadataSource, OfflineMetadataSource]) -> dict:
+    # package name -> enrichment meta, the metadata of all packages is fetched in one batch
+    datas = source.fetch(pkg_names)
+    return {name: pypi_meta(data) for name, data in datas.items()}
+
+
+def pypi_meta(data: Optional[dict]) -> dict:
     meta = {}
-    try:
-        data = response.json()
-        res = data.get("info", None)
-    except:
+    if not isinstance(data, dict):
         return meta
+    res = data.get("info", None)
     
     if res:
         meta["declaredLicense"] = res.get("license", None)
@@ -199,6 +198,7 @@ def req_pypi(pkg_name: Optional[str]) -> Optional[dict]:
 
 
 def parse_record(record_path: str) -> set:
+    import pandas as pd
     df = pd.read_csv(record_path, header=None)
     import_name = set()
     for pre in list(df[0]):
@@ -226,130 +226,204 @@ def find_site_packages(path: str) -> Optional[str]:
         return None
 
 
-def analyze_env(path: str) -> Optional[List[dict]]:
+def record_path_of(env_pkg: str, dist_info: str) -> str:
+    if "dist-info" in dist_info:
+        return os.path.join(env_pkg, dist_info, "RECORD")
+    return os.path.join(env_pkg, dist_info, "installed-files.txt")
+
+
+def analyze_dist_info(env_pkg: str, p: str) -> dict:
+    # component of an installed distribution, the top-level names in its RECORD and the digest of the RECORD
+    cur_path = os.path.join(env_pkg, p)
+    if "dist-info" in p:
+        metadata_path = os.path.join(cur_path, "METADATA")
+    else:
+        metadata_path = os.path.join(cur_path, "PKG-INFO")
+    info = {}
+    with open(metadata_path, "r", errors="ignore") as f:
+        rows = f.readlines()
+        for row in rows:
+            i = row.find(":")
+            if i > 0:
+                info[row[:i]] = row[i+1:].strip()
+    
+    name = info.get("Name", None)
+    if not name:
+        name = p.split("-")[0]
+    version = info.get("Version", None)
+    if not version:
+        version = p.replace(".dist-info", "").split("-")[-1]
+    logging.info(f"Analyzing Package {name}-{version}")
+    
+    description = info.get("Description", None)
+    if not description:
+        description = info.get("Summary", None)
+    meta = component_meta_template()
+    
+    originator = name_email_str2ind(name=info.get("Author", None), email=info.get("Author-email", None))
+    supplier = name_email_str2ind(name=info.get("Maintainer", None), email=info.get("Maintainer-email", None))
+    meta["component"] = middleware.Component(
+        type="Package: LIBRARY",
+        name=name,
+        version=version,
+        ID=IDManager.get_pkgID(pkgtype = "pypi", name = name, version = version),
+        originator=[originator] if originator else None,
+        supplier=supplier if supplier else None,
+        licenses=[middleware.License(type="concluded", spdxID=info.get("License", None))],
+        description=description,
+        download_location=info.get("Download-url", None),
+        homepage=info.get("Home-page", None),
+        source_repo=info.get("Project-url", None),
+    )
+    
+    record_path = record_path_of(env_pkg, p)
+    if name in ["setuptools", "pip"]:
+        imports = {name}
+    else:
+        imports = parse_record(record_path)
+    record_digest = file_sha256(record_path) if os.path.isfile(record_path) else None
+    return {"meta": meta, "name": name, "imports": imports, "record_digest": record_digest}
+
+
+def package_dir_keys(dist_infos: dict) -> dict:
+    # top-level directory -> cache key of the one distribution installing it, directories shared
+    # by several distributions (or installed without a RECORD) are not cached
+    owners = {}
+    for p, dist in dist_infos.items():
+        for imp in dist["imports"]:
+            key = package_dir_key(p, dist["record_digest"], imp) if dist["record_digest"] else None
+            owners.setdefault(imp, []).append(key)
+    return {imp: keys[0] for imp, keys in owners.items() if len(keys) == 1 and keys[0]}
+
+
+def analyze_package_dir(cur_path: str, previous_files: Optional[dict] = None) -> Tuple[List[str], List[str], List[List]]:
+    # imports and conditional imports of the python files in the directory, and the file
+    # components of those files (each followed by its snippets)
+    depends = []
+    conditional_depends = []
+    dir_files = []
+    paths = os.walk(cur_path)
+    for root, dirs, files in paths:
+        for file in files:
+            if is_py_file(file):
+                dependency, conditional_dependency = pyfile_depends(os.path.join(root, file))
+                remove_lst = []
+                for dep in dependency:
+                    if (dep + ".py") in files or dep in dirs:
+                        remove_lst.append(dep)
+                for dep in remove_lst:
+                    dependency.remove(dep)
+                    if dep in conditional_dependency:
+                        conditional_dependency.remove(dep)
+                depends.extend(dependency)
+                conditional_depends.extend(conditional_dependency)
+                
+                file_path = os.path.join(root, file)
+                comp_files = reuse_pyfile_meta(file_path, previous_files.get(file_path, None) if previous_files else None)
+                if comp_files:
+                    dir_files.append(comp_files)
+    return depends, conditional_depends, dir_files
+
+
+def analyze_env_entry(env_pkg: str, p: str, key: Optional[str], previous_files: Optional[dict] = None) -> Optional[tuple]:
+    # imports (and file components) of a top-level directory or module of site-packages,
+    # previous_files only holds the files of this entry from the previous SBOM
+    cur_path = os.path.join(env_pkg, p)
+    if os.path.isdir(cur_path):
+        if p in ["setuptools", "pip"]:
+            return [], [], []
+        # directories with files of the previous SBOM keep their component IDs, so they are not read from cache
+        cached = load_package_dir(key, cur_path) if key and not previous_files else None
+        if cached:
+            logging.info(f"Loaded the analysis of {p} from cache")
+            return cached["depends"], cached["conditional_depends"], cached["files"]
+        depends, conditional_depends, dir_files = analyze_package_dir(cur_path, previous_files)
+        if key:
+            save_package_dir(key, cur_path, depends, conditional_depends, dir_files)
+        return depends, conditional_depends, dir_files
+    elif is_py_file(cur_path):
+        if "setup" in cur_path or "test" in cur_path or "build" in cur_path:
+            return None
+        dependency, conditional_dependency = pyfile_depends(cur_path)
+        return dependency, conditional_dependency, []
+    return None
+
+
+def analyze_env(
+    path: str,
+    previous_files: Optional[dict] = None,
+    jobs: int = 1
+) -> Tuple[Optional[List[dict]], Optional[dict], Optional[dict]]:
     env_pkg = find_site_packages(path)
     if not env_pkg:
-        return None, None
+        return None, None, None
     
-    logging.info(f"Analyze Environment {env_pkg}...")
+    logging.info(f"Analyze Environment {env_pkg} with {max(jobs, 1)} worker(s)...")
     pkg_metas = []
-    env_list = os.listdir(env_pkg)
+    # entries are analyzed (possibly in worker processes) and merged in sorted order,
+    # so the result does not depend on the number of workers
+    env_list = sorted(os.listdir(env_pkg))
+    # distribution name -> set of the top-level import names it installs
     pkg2import = {}
     all_depends = {}
     cond_depends = {}
-    tem_relations = []
+    # file components contained in each top-level package directory, moved to the owning
+    # distribution once all the entries are scanned
+    dir_contains = {}
+    
+    dist_list = [p for p in env_list if "dist-info" in p or "egg-info" in p]
+    dist_infos = dict(zip(dist_list, Util.parallel_map(
+        analyze_dist_info, [(env_pkg, p) for p in dist_list], jobs, configure_scan_cache, scan_cache_args()
+    )))
+    dir_keys = package_dir_keys(dist_infos)
+    
+    # files of the previous SBOM, by top-level entry
+    entry_previous = {}
+    for file_path, comps in previous_files.items() if previous_files else []:
+        if file_path.startswith(env_pkg + os.sep):
+            entry_previous.setdefault(file_path[len(env_pkg) + 1:].split(os.sep)[0], {})[file_path] = comps
+    entry_list = [p for p in env_list if not p in dist_infos]
+    entry_results = dict(zip(entry_list, Util.parallel_map(
+        analyze_env_entry,
+        [(env_pkg, p, dir_keys.get(p, None), entry_previous.get(p, None)) for p in entry_list],
+        jobs,
+        configure_scan_cache,
+        scan_cache_args()
+    )))
+    
     for p in env_list:
-        cur_path = os.path.join(env_pkg, p)
-        if "dist-info" in p or "egg-info" in p:
-            if "dist-info" in p:
-                metadata_path = os.path.join(cur_path, "METADATA")
-            else:
-                metadata_path = os.path.join(cur_path, "PKG-INFO")
-            info = {}
-            with open(metadata_path, "r", errors="ignore") as f:
-                rows = f.readlines()
-                for row in rows:
-                    i = row.find(":")
-                    if i > 0:
-                        info[row[:i]] = row[i+1:].strip()
-            
-            name = info.get("Name", None)
-            if not name:
-                name = p.split("-")[0]
-            version = info.get("Version", None)
-            if not version:
-                version = p.replace(".dist-info", "").split("-")[-1]
-            logging.info(f"Analyzing Package {name}-{version}")
-            
-            description = info.get("Description", None)
-            if not description:
-                description = info.get("Summary", None)
-            meta = component_meta_template()
-            
-            originator = name_email_str2ind(name=info.get("Author", None), email=info.get("Author-email", None))
-            supplier = name_email_str2ind(name=info.get("Maintainer", None), email=info.get("Maintainer-email", None))
-            meta["component"] = middleware.Component(
-                type="Package: LIBRARY",
-                name=name,
-                version=version,
-                ID=IDManager.get_pkgID(pkgtype = "pypi", name = name, version = version),
-                originator=[originator] if originator else None,
-                supplier=supplier if supplier else None,
-                licenses=[middleware.License(type="concluded", spdxID=info.get("License", None))],
-                description=description,
-                download_location=info.get("Download-url", None),
-                homepage=info.get("Home-page", None),
-                source_repo=info.get("Project-url", None),
-            )
-            pkg_metas.append(meta)
-            
-            if "dist-info" in p:
-                record_path = os.path.join(env_pkg, p, "RECORD")
-            else:
-                record_path = os.path.join(env_pkg, p, "installed-files.txt")
-            if name in ["setuptools", "pip"]:
-                pkg2import[name] = name
-            else:
-                pkg2import[name] = parse_record(record_path)
-            
-        elif os.path.isdir(cur_path):
-            if p in ["setuptools", "pip"]:
-                all_depends[p] = []
-                cond_depends[p] = []
-                continue
-            depends = []
-            conditional_depends = []
-            paths = os.walk(cur_path)
-            for root, dirs, files in paths:
-                for file in files:
-                    if is_py_file(file):
-                        dependency, conditional_dependency = pyfile_depends(os.path.join(root, file))
-                        remove_lst = []
-                        for dep in dependency:
-                            if (dep + ".py") in files or dep in dirs:
-                                remove_lst.append(dep)
-                        for dep in remove_lst:
-                            dependency.remove(dep)
-                            if dep in conditional_dependency:
-                                conditional_dependency.remove(dep)
-                        depends.extend(dependency)
-                        conditional_depends.extend(conditional_dependency)
-                        
-                        comp_files = analyze_pyfile_meta(os.path.join(root, file))
-                        if comp_files:
-                            file_meta = component_meta_template()
-                            for i, one_comp in enumerate(comp_files):
-                                if i == 0:
-                                    file_meta["component"] = one_comp
-                                    file_meta["relationships"]["contains"] = []
-                                else:
-                                    rel = middleware.Relationship(
-                                        type="CONTAINS",
-                                        sourceID=file_meta["component"].ID,
-                                        targetID=one_comp.ID
-                                    )
-                                    if not (rel in file_meta["relationships"]["contains"]):
-                                        file_meta["relationships"]["contains"].append(rel)
-
-                                    one_comp_meta = component_meta_template()
-                                    one_comp_meta["component"] = one_comp
-                                    pkg_metas.append(one_comp_meta)
-                            pkg_metas.append(file_meta)
-                            contain_rel = middleware.Relationship(
-                                type="CONTAINS",
-                                sourceID=p,
-                                targetID=file_meta["component"].ID
-                            )
-                            if not contain_rel in tem_relations:
-                                tem_relations.append(contain_rel)
-            all_depends[p] = list(set(depends))
-            cond_depends[p] = list(set(conditional_depends))
-        elif is_py_file(cur_path):
-            if "setup" in cur_path or "test" in cur_path or "build" in cur_path:
-                continue
-            dependency, conditional_dependency = pyfile_depends(cur_path)
-            all_depends[p.replace(".py", "")] = list(set(dependency))
-            cond_depends[p.replace(".py", "")] = list(set(conditional_dependency))
+        if p in dist_infos:
+            dist = dist_infos[p]
+            pkg_metas.append(dist["meta"])
+            pkg2import[dist["name"]] = dist["imports"]
+            continue
+        result = entry_results[p]
+        if result is None:
+            continue
+        depends, conditional_depends, dir_files = result
+        for comp_files in dir_files:
+            file_meta = component_meta_template()
+            for i, one_comp in enumerate(comp_files):
+                if i == 0:
+                    file_meta["component"] = one_comp
+                    file_meta["relationships"]["contains"] = []
+                else:
+                    rel = middleware.Relationship(
+                        type="CONTAINS",
+                        sourceID=file_meta["component"].ID,
+                        targetID=one_comp.ID
+                    )
+                    if not (rel in file_meta["relationships"]["contains"]):
+                        file_meta["relationships"]["contains"].append(rel)
+
+                    one_comp_meta = component_meta_template()
+                    one_comp_meta["component"] = one_comp
+                    pkg_metas.append(one_comp_meta)
+            pkg_metas.append(file_meta)
+            dir_contains.setdefault(p, {})[file_meta["component"].ID] = None
+        name = p if os.path.isdir(os.path.join(env_pkg, p)) else p.replace(".py", "")
+        all_depends[name] = list(set(depends))
+        cond_depends[name] = list(set(conditional_depends))
     
     # logging.info(f"all_depends: {all_depends}")
     # logging.info(f"cond_depends: {cond_depends}")
@@ -360,40 +434,43 @@ def analyze_env(path: str) -> Optional[List[dict]]:
         import_name = pkg2import.get(name, [])
         depends = []
         pkg_cond_depends = []
+        pkg_contain = RelationshipIndex(pkg["relationships"].get("contains", []))
         for imp in import_name:
             if imp in all_depends:
                 depends += all_depends[imp]
                 pkg_cond_depends += cond_depends[imp]
-            remove_rels = []
-            # logging.info(f"tem_relations: {tem_relations}")
-            for tem_rel in tem_relations:
-                if tem_rel.sourceID == imp:
-                    remove_rels.append(tem_rel)
-                    new_rel = middleware.Relationship(
-                        type=tem_rel.type,
-                        sourceID=pkg["component"].ID,
-                        targetID=tem_rel.targetID
-                    )
-                    pkg_contain = pkg["relationships"].get("contains", [])
-                    if not new_rel in pkg_contain:
-                        pkg_contain.append(new_rel)
-                        pkg["relationships"]["contains"] = pkg_contain
-            for rel in remove_rels:
-                tem_relations.remove(rel)
+            for target_id in dir_contains.pop(imp, {}):
+                new_rel = middleware.Relationship(
+                    type="CONTAINS",
+                    sourceID=pkg["component"].ID,
+                    targetID=target_id
+                )
+                pkg_contain.add(new_rel)
+        if len(pkg_contain):
+            pkg["relationships"]["contains"] = pkg_contain.to_list()
         pkg["dependson"] = {}
         pkg["dependson"]["all_depends"] = list(set(depends))
         pkg["dependson"]["conditional_depends"] = list(set(pkg_cond_depends))
     logging.info("Analyze Environment Done!")
-    return pkg_metas, pkg2import
+    return pkg_metas, pkg2import, invert_pkg2import(pkg2import)
+
+
+def invert_pkg2import(pkg2import: dict) -> dict:
+    # top-level import name -> names of the distributions providing it, in pkg2import order
+    import2pkg = {}
+    for pkg_name, imports in pkg2import.items():
+        for imp in imports:
+            import2pkg.setdefault(imp, []).append(pkg_name)
+    return import2pkg
 
 
 def merge_depends_withenv(
     depends: dict, 
     rel_type: str, 
-    relations: List[middleware.Relationship], 
+    relations: RelationshipIndex, 
     comp_dic: dict, 
-    pkg2import: dict
-) -> List[middleware.Relationship]:
+    import2pkg: dict
+) -> RelationshipIndex:
     for comp_name, comp_deps in depends.items():
         if comp_deps:
             test_comp = comp_dic.get(comp_name, None)
@@ -408,20 +485,17 @@ def merge_depends_withenv(
                             sourceID=comp_dic[d].ID,
                             targetID=test_comp.ID
                         )
-                        if not (rel in relations):
-                            relations.append(rel)
+                        relations.add(rel)
                 else:
-                    for pkg_name, deps in pkg2import.items():
-                        if dep in deps:
-                            comp = comp_dic.get(pkg_name, None)
-                            if comp:
-                                rel = middleware.Relationship(
-                                    type=rel_type,
-                                    sourceID=comp.ID,
-                                    targetID=test_comp.ID
-                                )
-                                if not (rel in relations):
-                                    relations.append(rel)
+                    for pkg_name in import2pkg.get(dep, []):
+                        comp = comp_dic.get(pkg_name, None)
+                        if comp:
+                            rel = middleware.Relationship(
+                                type=rel_type,
+                                sourceID=comp.ID,
+                                targetID=test_comp.ID
+                            )
+                            relations.add(rel)
     return relations
 
 
@@ -430,7 +504,7 @@ def merge_depends_withoutenv(
     rel_type: str, 
     comp_dic: dict, 
     component_list: List, 
-    relations: List
+    relations: RelationshipIndex
 ) -> Tuple:
     from_file_depends = []
     from_meta_depends = []
@@ -473,8 +547,7 @@ def merge_depends_withoutenv(
                         sourceID=comp_dic["root"].ID,
                         targetID=comp_dic[correspond_pkg].ID
                     )
-                    if not rel in relations:
-                        relations.append(rel)
+                    relations.add(rel)
                 
                 for dep in from_meta_depends:
                     if not dep in comp_dic:
@@ -492,8 +565,7 @@ def merge_depends_withoutenv(
                             sourceID=comp_dic["root"].ID,
                             targetID=comp_dic[dep].ID
                         )
-                        if not rel in relations:
-                            relations.append(rel)
+                        relations.add(rel)
             else:
                 if not comp_dic.get(comp_name, None):
                     comp = middleware.Component(
@@ -520,27 +592,82 @@ def merge_depends_withoutenv(
                         sourceID=comp_dic[comp_name].ID,
                         targetID=comp_dic[pkg_name].ID
                     )
-                    if not rel in relations:
-                        relations.append(rel)
+                    relations.add(rel)
     # logging.info(f"rel-type: {rel_type}\nrelations: {relations}")
     return comp_dic, component_list, relations
 
 
+def classify_file(file: str) -> Optional[str]:
+    if file in METAFILE2FUNC:
+        return "meta"
+    elif ((not ".license" in file.lower()) and "license" in file.lower()):
+        return "license"
+    elif ((not ".copyright" in file.lower()) and "copyright" in file.lower()):
+        return "copyright"
+    elif is_py_file(file):
+        return "source"
+    return None
+
+
+def set_source_context(source_dirs: dict, previous_files: dict) -> None:
+    # source_dirs: directory -> (set of its subdirectories, set of its files)
+    _source_context["dirs"] = source_dirs
+    _source_context["previous_files"] = previous_files
+
+
+def init_source_worker(source_dirs: dict, previous_files: dict, cache_dir: Optional[str], use_cache: bool) -> None:
+    # initializer of the worker processes, which also need the scan cache setting of the parent
+    set_source_context(source_dirs, previous_files)
+    configure_scan_cache(cache_dir, use_cache)
+
+
+def analyze_source_file(root: str, file: str) -> Tuple[List[str], Optional[List]]:
+    dirs, files = _source_context["dirs"][root]
+    file_path = os.path.join(root, file)
+    dependency, _ = pyfile_depends(file_path)
+    remove_lst = []
+    for dep in dependency:
+        if dep in dirs or (dep + ".py") in files or dep in root:
+            remove_lst.append(dep)
+    for dep in remove_lst:
+        dependency.remove(dep)
+    
+    comp_list = reuse_pyfile_meta(file_path, _source_context["previous_files"].get(file_path, None))
+    return dependency, comp_list
+
+
 def build_bom(
     path: str, 
-    env: Optional[str] = None
+    env: Optional[str] = None,
+    jobs: int = 1,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+    since: Optional[str] = None,
+    index_url: str = DEFAULT_INDEX_URL,
+    metadata_source: str = "online"
 ) -> middleware.Middleware:
+    configure_scan_cache(cache_dir, use_cache)
+    
+    # file components of unchanged files are carried over from the previous SBOM
+    previous_files = {}
+    if since:
+        try:
+            previous_bom = read_bom(since)
+        except:
+            raise Exception("Only JSON format is supported for the previous SBOM")
+        previous_files = index_pyfile_meta(Util.choose_model(previous_bom))
+        logging.info(f"Loaded {len(previous_files)} file components from {since}")
     comp_dic = {}
     component_list = []
     common_comp_list = []
-    relations = []
+    relations = RelationshipIndex()
     
     paths = os.walk(path)
     key_words = ["alias", "Alias", "sample", "Sample", "ci", ".git"]
     
     pkg_metas = None
     if env:
-        pkg_metas, pkg2import = analyze_env(env)
+        pkg_metas, pkg2import, import2pkg = analyze_env(env, previous_files, jobs)
     
     comp_license = None
     comp_copyright = None
@@ -548,6 +675,7 @@ def build_bom(
     testdepends = {}
     builddepends = {}
     devdepends = {}
+    walk_entries = []
     for root, dirs, files in paths:
         if env and root.startswith(env):
             continue
@@ -568,11 +696,35 @@ def build_bom(
                         break
                 if env_flag:
                     env = root
-                    pkg_metas, pkg2import = analyze_env(env)
-        
+                    pkg_metas, pkg2import, import2pkg = analyze_env(env, previous_files, jobs)
+        walk_entries.append((root, dirs, files))
+    
+    # analyze source files (possibly in worker processes), then merge the results in walk order
+    # the listing of each directory is sent once per process, not with every file in it
+    source_jobs = []
+    source_dirs = {}
+    previous_sources = {}
+    for root, dirs, files in walk_entries:
+        for file in files:
+            if classify_file(file) == "source":
+                source_jobs.append((root, file))
+                if not root in source_dirs:
+                    source_dirs[root] = (set(dirs), set(files))
+                file_path = os.path.join(root, file)
+                if file_path in previous_files:
+                    previous_sources[file_path] = previous_files[file_path]
+    logging.info(f"Analyzing {len(source_jobs)} source files with {max(jobs, 1)} worker(s)...")
+    set_source_context(source_dirs, previous_sources)
+    source_results = iter(Util.parallel_map(
+        analyze_source_file, source_jobs, jobs, init_source_worker, (source_dirs, previous_sources) + scan_cache_args()
+    ))
+    set_source_context({}, {})
+    
+    for root, dirs, files in walk_entries:
         logging.info(f"Dig into {root}...")
         for file in files:
-            if file in METAFILE2FUNC:
+            file_kind = classify_file(file)
+            if file_kind == "meta":
                 meta_data = METAFILE2FUNC[file](os.path.join(root, file))
                 if meta_data["component"]:
                     if file in ["Pipfile.lock", "poetry.lock", "pdm.lock"]:
@@ -607,23 +759,17 @@ def build_bom(
                             comp_deps.extend(deps)
                             devdepends[comp_name] = comp_deps
             
-            elif ((not ".license" in file.lower()) and "license" in file.lower()):
-                license_info = get_licenses(os.path.join(root, file))
+            elif file_kind == "license":
+                license_info = scan_licenses(os.path.join(root, file))
                 comp_license = middleware.License(
                     type="concluded",
                     spdxID=license_info.get("detected_license_expression_spdx", None),
                     name=license_info.get("detected_license_expression", None),
                 )
-            elif ((not ".copyright" in file.lower()) and "copyright" in file.lower()):
+            elif file_kind == "copyright":
                 comp_copyright = copyright_from_pkgfile(os.path.join(root, file))
-            elif is_py_file(file):
-                dependency, _ = pyfile_depends(os.path.join(root, file))
-                remove_lst = []
-                for dep in dependency:
-                    if dep in dirs or (dep + ".py") in files or dep in root:
-                        remove_lst.append(dep)
-                for dep in remove_lst:
-                    dependency.remove(dep)
+            elif file_kind == "source":
+                dependency, comp_list = next(source_results)
 
                 if "test" in root.replace(path, ""):
                     comp_deps = testdepends.get("root", [])
@@ -642,7 +788,6 @@ def build_bom(
                     comp_deps.extend(dependency)
                     dependson["root"] = comp_deps
                 
-                comp_list = analyze_pyfile_meta(os.path.join(root, file))
                 if comp_list:
                     common_comp_list.extend(comp_list)
                     for i, comp_file in enumerate(comp_list):
@@ -656,8 +801,7 @@ def build_bom(
                             sourceID=rel_source,
                             targetID=comp_file.ID
                         )
-                        if not contain_rel in relations:
-                            relations.append(contain_rel)
+                        relations.add(contain_rel)
 
     if comp_dic.get("root", None):
         root_comp = comp_dic["root"]
@@ -690,9 +834,7 @@ def build_bom(
         comp_dic["root"] = root_comp
         common_comp_list.insert(0, root_comp)
     
-    for rel in relations:
-        if rel.sourceID == "root":
-            rel.sourceID = comp_dic["root"].ID
+    relations.rename("root", comp_dic["root"].ID)
     
     logging.info("Merging all the info...")
     if pkg_metas:
@@ -712,48 +854,44 @@ def build_bom(
         
         for pkg in pkg_metas:
             for dep_import in pkg["dependson"].get("all_depends", []):
-                for pkg_name, deps in pkg2import.items():
-                    if dep_import in deps:
-                        if dep_import in pkg["dependson"]["conditional_depends"]:
-                            if not normalize_pkgname(pkg_name) in query_pkg_imports.get(pkg["component"].name, []):
-                                continue
-                        comp = comp_dic.get(pkg_name, None)
-                        if comp:
-                            if comp.name == pkg["component"].name:
-                                continue
-                            logging.info(f"Add DEPENDS_ON Relationship between {pkg['component'].name} and {comp.name}")
-                            rel = middleware.Relationship(
-                                type="DEPENDS_ON",
-                                sourceID=pkg["component"].ID,
-                                targetID=comp.ID
-                            )
-                            if not rel in relations:
-                                relations.append(rel)
-                            break
-
-        root_deps = dependson.get("root", [])
-        root_deps = [dep for dep in root_deps if isinstance(dep, str)]
-        root_deps = list(set(root_deps))
-        for dep_import in root_deps:
-            for pkg_name, deps in pkg2import.items():
-                if dep_import in deps:
+                for pkg_name in import2pkg.get(dep_import, []):
+                    if dep_import in pkg["dependson"]["conditional_depends"]:
+                        if not normalize_pkgname(pkg_name) in query_pkg_imports.get(pkg["component"].name, []):
+                            continue
                     comp = comp_dic.get(pkg_name, None)
                     if comp:
-                        if comp.name == root_comp.name:
+                        if comp.name == pkg["component"].name:
                             continue
                         logging.info(f"Add DEPENDS_ON Relationship between {pkg['component'].name} and {comp.name}")
                         rel = middleware.Relationship(
                             type="DEPENDS_ON",
-                            sourceID=root_comp.ID,
+                            sourceID=pkg["component"].ID,
                             targetID=comp.ID
                         )
-                        if not rel in relations:
-                            relations.append(rel)
+                        relations.add(rel)
                         break
+
+        root_deps = dependson.get("root", [])
+        root_deps = [dep for dep in root_deps if isinstance(dep, str)]
+        root_deps = list(set(root_deps))
+        for dep_import in root_deps:
+            for pkg_name in import2pkg.get(dep_import, []):
+                comp = comp_dic.get(pkg_name, None)
+                if comp:
+                    if comp.name == root_comp.name:
+                        continue
+                    logging.info(f"Add DEPENDS_ON Relationship between {pkg['component'].name} and {comp.name}")
+                    rel = middleware.Relationship(
+                        type="DEPENDS_ON",
+                        sourceID=root_comp.ID,
+                        targetID=comp.ID
+                    )
+                    relations.add(rel)
+                    break
         
-        relations = merge_depends_withenv(testdepends, "TEST_DEPENDENCY_OF", relations, comp_dic, pkg2import)
-        relations = merge_depends_withenv(builddepends, "BUILD_DEPENDENCY_OF", relations, comp_dic, pkg2import)
-        relations = merge_depends_withenv(devdepends, "DEV_DEPENDENCY_OF", relations, comp_dic, pkg2import)
+        relations = merge_depends_withenv(testdepends, "TEST_DEPENDENCY_OF", relations, comp_dic, import2pkg)
+        relations = merge_depends_withenv(builddepends, "BUILD_DEPENDENCY_OF", relations, comp_dic, import2pkg)
+        relations = merge_depends_withenv(devdepends, "DEV_DEPENDENCY_OF", relations, comp_dic, import2pkg)
     else:
         logging.info("No Environment Info!")
         # 文件中的所有comp，root_comp，py文件
@@ -764,8 +902,12 @@ def build_bom(
         comp_dic, component_list, relations = merge_depends_withoutenv(devdepends, "DEV_DEPENDENCY_OF", comp_dic, component_list, relations)
 
         # req_pypi, 补全所有的ID, 补全purl
+        metas = req_pypi(
+            [comp.name for comp in component_list], 
+            get_metadata_source(metadata_source, index_url, cache_dir, use_cache)
+        )
         for comp in component_list:
-            meta = req_pypi(comp.name)
+            meta = metas.get(comp.name, None)
             if not meta:
                 continue
             if meta.get("declaredLicense", None):
@@ -837,7 +979,7 @@ def build_bom(
             )
         ],
         components=component_list,
-        relationship=relations
+        relationship=relations.to_list()
     )
     
     return midware
@@ -0,0 +1,73 @@
+import os
+import hashlib
+import logging
+import sqlite3
+from typing import List, Optional
+from . import scan_cache
+from .utils import IDManager
+from ....output import middleware
+
+
+# analysis of the top-level package directories of installed distributions, stored in the scan cache
+# under a key made of the distribution name and version (the name of its .dist-info or .egg-info
+# directory) and the digest of its RECORD. The RECORD lists the hash of every installed file, so an
+# unchanged digest means the directory can be reused as is
+PACKAGE_DIR_KIND = "package_dir"
+
+
+def package_dir_key(dist_info: str, record_digest: str, top_level: str) -> str:
+    return hashlib.sha256(f"{dist_info}\0{record_digest}\0{top_level}".encode()).hexdigest()
+
+
+def load_package_dir(key: str, pkg_dir: str) -> Optional[dict]:
+    # {"depends": [...], "conditional_depends": [...], "files": [[file component, snippets...], ...]},
+    # with the paths moved to pkg_dir and new component IDs
+    if scan_cache.scan_cache is None:
+        return None
+    try:
+        result = scan_cache.scan_cache.get(key, PACKAGE_DIR_KIND)
+    except sqlite3.Error as e:
+        logging.warning(f"Scan cache is unavailable for {pkg_dir}: {e}")
+        return None
+    if result is None:
+        return None
+    files = []
+    for comps in result["files"]:
+        files.append(relocate_components(
+            [middleware.Component.model_validate(comp) for comp in comps], result["pkg_dir"], pkg_dir
+        ))
+    return {
+        "depends": result["depends"],
+        "conditional_depends": result["conditional_depends"],
+        "files": files,
+    }
+
+
+def save_package_dir(key: str, pkg_dir: str, depends: List[str], conditional_depends: List[str], files: List[List]) -> None:
+    if scan_cache.scan_cache is None:
+        return
+    result = {
+        "pkg_dir": pkg_dir,
+        "depends": depends,
+        "conditional_depends": conditional_depends,
+        "files": [[comp.model_dump(mode="json", exclude_none=True) for comp in comps] for comps in files],
+    }
+    try:
+        scan_cache.scan_cache.put(key, PACKAGE_DIR_KIND, result)
+    except sqlite3.Error as e:
+        logging.warning(f"Failed to save the analysis of {pkg_dir}: {e}")
+
+
+def relocate_components(comps: List[middleware.Component], old_dir: str, new_dir: str) -> List[middleware.Component]:
+    # file and snippet names contain the path of the file, the snippets refer to the file by its ID
+    new_ids = {}
+    for comp in comps:
+        new_ids[comp.ID] = IDManager.get_innerID()
+        comp.ID = new_ids[comp.ID]
+        if old_dir != new_dir:
+            comp.name = comp.name.replace(old_dir + os.sep, new_dir + os.sep, 1)
+    for comp in comps:
+        if isinstance(comp.scope, list):
+            for scope in comp.scope:
+                scope.fromFile = new_ids.get(scope.fromFile, scope.fromFile)
+    return comps
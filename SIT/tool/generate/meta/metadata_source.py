@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from .scan_cache import DEFAULT_CACHE_DIR
+
+
+DEFAULT_INDEX_URL = "https://pypi.org/pypi"
+DEFAULT_TTL = 24 * 60 * 60
+PYPI_NAME_REGEX = re.compile(r'^([A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9])$', re.IGNORECASE)
+
+
+class PypiResponseCache:
+    # /pypi/<name>/json responses keyed by index URL and name, kept with their ETag for revalidation.
+    # The document describes the latest release, the versions of the components are requirement
+    # specifiers (">=1.0") more often than not, so they are not part of the key
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "pypi.sqlite3"), timeout=60)
+        # the table written by earlier SIT releases, its version column was always empty
+        self.conn.execute("DROP TABLE IF EXISTS response")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pypi_json ("
+            "url TEXT NOT NULL, name TEXT NOT NULL, etag TEXT, "
+            "fetched_at REAL NOT NULL, body TEXT NOT NULL, PRIMARY KEY (url, name))"
+        )
+        self.conn.commit()
+
+    def get(self, url: str, name: str) -> Optional[tuple]:
+        return self.conn.execute(
+            "SELECT etag, fetched_at, body FROM pypi_json WHERE url = ? AND name = ?",
+            (url, name)
+        ).fetchone()
+
+    def put(self, url: str, name: str, etag: Optional[str], body: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pypi_json (url, name, etag, fetched_at, body) VALUES (?, ?, ?, ?, ?)",
+            (url, name, etag, time.time(), body)
+        )
+        self.conn.commit()
+
+    def touch(self, url: str, name: str) -> None:
+        self.conn.execute(
+            "UPDATE pypi_json SET fetched_at = ? WHERE url = ? AND name = ?",
+            (time.time(), url, name)
+        )
+        self.conn.commit()
+
+
+class OnlineMetadataSource:
+    def __init__(
+        self,
+        index_url: str = DEFAULT_INDEX_URL,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        ttl: int = DEFAULT_TTL,
+        timeout: float = 10,
+        workers: int = 16
+    ) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.index_url = index_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.workers = workers
+        self.cache = PypiResponseCache(cache_dir if cache_dir else DEFAULT_CACHE_DIR) if use_cache else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, name: str) -> str:
+        return f"{self.index_url}/{name}/json"
+
+    def request(self, name: str, etag: Optional[str]) -> tuple:
+        # runs in worker threads, returns (status, etag, body) without touching the cache
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            response = self.session.get(self.url(name), headers=headers, timeout=self.timeout)
+        except Exception as e:
+            logging.warning(f"Failed to request metadata of {name} from {self.index_url}: {e}")
+            return None, None, None
+        return response.status_code, response.headers.get("ETag", None), response.text
+
+    def fetch(self, names: List[str]) -> Dict[str, Optional[dict]]:
+        # name -> parsed JSON document (None if unavailable), requests are sent concurrently
+        results = {}
+        pending = {}
+        for name in dict.fromkeys(names):
+            if not name or not PYPI_NAME_REGEX.match(name):
+                results[name] = None
+                continue
+            cached = self.cache.get(self.index_url, name) if self.cache else None
+            if cached and time.time() - cached[1] < self.ttl:
+                results[name] = json.loads(cached[2])
+            else:
+                pending[name] = cached
+
+        if pending:
+            logging.info(f"Requesting metadata of {len(pending)} packages from {self.index_url}...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                responses = executor.map(
+                    lambda name: self.request(name, pending[name][0] if pending[name] else None),
+                    list(pending)
+                )
+                for name, (status, etag, body) in zip(list(pending), responses):
+                    cached = pending[name]
+                    if status == 304 and cached:
+                        self.cache.touch(self.index_url, name)
+                        body = cached[2]
+                    elif status is None and cached:
+                        body = cached[2]
+                    elif status != 200:
+                        results[name] = None
+                        continue
+                    elif self.cache:
+                        self.cache.put(self.index_url, name, etag, body)
+                    try:
+                        results[name] = json.loads(body)
+                    except ValueError:
+                        results[name] = None
+        return results
+
+
+def canonical_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class OfflineMetadataSource:
+    # answers from a local snapshot of /pypi/<name>/json documents, either a directory of
+    # <name>.json files or a SQLite file with a table metadata(name TEXT PRIMARY KEY, body TEXT)
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.files = None
+        self.conn = None
+        if os.path.isdir(path):
+            self.files = {}
+            for file in os.listdir(path):
+                if file.endswith(".json"):
+                    self.files[canonical_name(file[:-len(".json")])] = os.path.join(path, file)
+            logging.info(f"Loaded offline metadata index of {len(self.files)} packages from {path}")
+        elif os.path.isfile(path):
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            raise ValueError(f"Offline metadata snapshot not found: {path}")
+
+    def get(self, name: str) -> Optional[dict]:
+        if self.files is not None:
+            file = self.files.get(canonical_name(name), None)
+            if not file:
+                return None
+            with open(file, "r") as f:
+                return json.load(f)
+        row = self.conn.execute("SELECT body FROM metadata WHERE name = ?", (canonical_name(name),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def fetch(self, names: List[str]) -> Dict[str, Optional[dict]]:
+        results = {}
+        for name in dict.fromkeys(names):
+            if not name or not PYPI_NAME_REGEX.match(name):
+                results[name] = None
+                continue
+            try:
+                results[name] = self.get(name)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                logging.warning(f"Failed to read offline metadata of {name}: {e}")
+                results[name] = None
+        return results
+
+
+def get_metadata_source(
+    source: str = "online",
+    index_url: str = DEFAULT_INDEX_URL,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True
+) -> Union[OnlineMetadataSource, OfflineMetadataSource]:
+    if source == "online":
+        return OnlineMetadataSource(index_url, cache_dir, use_cache)
+    elif source.startswith("offline:"):
+        return OfflineMetadataSource(source[len("offline:"):])
+    else:
+        raise ValueError(f"Unsupported metadata source: {source}")
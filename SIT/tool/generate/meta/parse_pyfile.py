@@ -1,14 +1,15 @@
+import os
 import ast
 from  typing import List, Optional
 import hashlib
 # from scancode_toolkit.src.scancode.api import get_licenses, get_copyrights, get_file_info
-from scancode.api import get_licenses, get_copyrights, get_file_info
 from  .utils import name_email_str2ind, IDManager
+from .scan_cache import scan_licenses, scan_copyrights, scan_file_info, file_sha256
 from ....output import middleware
 
 
 def copyright_from_pkgfile(path: str) -> Optional[str]:
-    cr = get_copyrights(path).get("copyrights", [])
+    cr = scan_copyrights(path).get("copyrights", [])
     if cr:
         all_cr = ""
         for line in cr:
@@ -93,19 +94,18 @@ def analyze_pyfile_meta(path: str) -> Optional[List]:
         return None
 
     component_list = []
-    license_info = get_licenses(path, include_text = True, unknown_licenses=True)
+    license_info = scan_licenses(path, include_text = True, unknown_licenses=True)
     file_spdx_id = license_info.get("detected_license_expression_spdx", None)
-    if not file_spdx_id:
-        return None
-    file_info = get_file_info(path)
-    cr_info = get_copyrights(path)
+    file_info = scan_file_info(path)
+    cr_info = scan_copyrights(path)
     all_cr = cr_info.get("copyrights", [])
     
+    # files scanned without a license finding are kept too, so --since can reuse the empty result
     file_lic = middleware.License(
         type="concluded",
         spdxID=file_spdx_id,
         name=license_info.get("detected_license_expression", None),
-    )
+    ) if file_spdx_id else None
     checksums = []
     if file_info.get("sha1", None):
         checksums.append(
@@ -134,7 +134,7 @@ def analyze_pyfile_meta(path: str) -> Optional[List]:
         mime_type=file_info.get("mime_type", None),
         name=path,
         ID=fileID,
-        licenses=[file_lic],
+        licenses=[file_lic] if file_lic else None,
         checksum=checksums,
     )
     
@@ -245,3 +245,40 @@ def analyze_pyfile_meta(path: str) -> Optional[List]:
         component_list.append(comp)
 
     return component_list
+
+
+def index_pyfile_meta(midware: Optional[middleware.Middleware]) -> dict:
+    # file path -> [file component, snippet components...], as returned by analyze_pyfile_meta
+    if not midware or not midware.components:
+        return {}
+    file_comps = {}
+    id2path = {}
+    for comp in midware.components:
+        if comp.type == "File: SOURCE" and comp.checksum:
+            file_comps[comp.name] = [comp]
+            id2path[comp.ID] = comp.name
+    for comp in midware.components:
+        if comp.type == "Snippet" and isinstance(comp.scope, list) and comp.scope:
+            path = id2path.get(comp.scope[0].fromFile, None)
+            if path:
+                file_comps[path].append(comp)
+    return file_comps
+
+
+def is_unchanged_file(path: str, file_comp: middleware.Component) -> bool:
+    checksums = {ck.alg: ck.value for ck in file_comp.checksum} if file_comp.checksum else {}
+    if not os.path.isfile(path):
+        return False
+    if checksums.get("SHA256", None):
+        return file_sha256(path) == checksums["SHA256"]
+    for alg, algo in (("SHA1", hashlib.sha1), ("MD5", hashlib.md5)):
+        if checksums.get(alg, None):
+            with open(path, "rb") as f:
+                return algo(f.read()).hexdigest() == checksums[alg]
+    return False
+
+
+def reuse_pyfile_meta(path: str, previous_comps: Optional[List] = None) -> Optional[List]:
+    if previous_comps and is_unchanged_file(path, previous_comps[0]):
+        return previous_comps
+    return analyze_pyfile_meta(path)
@@ -2,8 +2,6 @@ import toml
 import json
 import os
 from typing import List, Dict
-# from scancode_toolkit.src.packagedcode.pypi_setup_py import parse_setup_py
-from packagedcode.pypi_setup_py import parse_setup_py
 import pip_requirements_parser
 from ....output import middleware
 from .utils import ALGOLIST, parse_depend, name_email_str2ind, component_meta_template, str2license, IDManager, get_imports
@@ -13,6 +11,8 @@ from .utils import ALGOLIST, parse_depend, name_email_str2ind, component_meta_te
 
 # setup.py
 def analyze_setup_meta(path: str) -> dict:
+    # from scancode_toolkit.src.packagedcode.pypi_setup_py import parse_setup_py
+    from packagedcode.pypi_setup_py import parse_setup_py
     meta = component_meta_template()
     parse_file = parse_setup_py(path)
     homepage = parse_file.get("url", None)
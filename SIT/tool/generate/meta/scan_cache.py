@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from multiprocessing.util import Finalize
+from typing import Callable, Optional
+from .... import __version__ as sit_version
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "sit"
+)
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+# last_access updates of cache hits are written in batches of this size
+TOUCH_BATCH_SIZE = 256
+# the size of the stored results is summed up again every EVICT_INTERVAL puts, other processes
+# write to the same file, so the running total of a single process drifts
+EVICT_INTERVAL = 256
+# eviction frees space down to this share of max_size, so it doesn't run again on the next put
+EVICT_TARGET = 0.9
+
+
+class ScanCache:
+    # scancode results keyed by the sha256 of the file content, evicted in LRU order once
+    # the stored results exceed max_size bytes
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        from scancode_config import __version__ as scancode_version
+        self.version = f"scancode-{scancode_version}/sit-{sit_version}"
+        self._conn = None
+        self._pid = None
+        self._total = 0
+        self._puts = 0
+        self._touched = []
+        # pending touches are written when the process exits, worker processes included
+        self._finalizer = Finalize(self, ScanCache.flush_touches, args=(self,), exitpriority=10)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # every worker process opens its own connection
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, "scan.sqlite3"), timeout=60)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan ("
+                "digest TEXT NOT NULL, kind TEXT NOT NULL, version TEXT NOT NULL, "
+                "result TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, "
+                "PRIMARY KEY (digest, kind, version))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS scan_last_access ON scan (last_access)")
+            self._conn.commit()
+            self._pid = os.getpid()
+            self._total = self.stored_size()
+            self._puts = 0
+            self._touched = []
+        return self._conn
+
+    def stored_size(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM scan").fetchone()[0]
+
+    def get(self, digest: str, kind: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT result FROM scan WHERE digest = ? AND kind = ? AND version = ?",
+            (digest, kind, self.version)
+        ).fetchone()
+        if not row:
+            return None
+        self._touched.append((time.time(), digest, kind, self.version))
+        if len(self._touched) >= TOUCH_BATCH_SIZE:
+            self.flush_touches()
+        return json.loads(row[0])
+
+    def flush_touches(self) -> None:
+        if not self._touched or self._pid != os.getpid():
+            return
+        touched, self._touched = self._touched, []
+        try:
+            self.conn.executemany(
+                "UPDATE scan SET last_access = ? WHERE digest = ? AND kind = ? AND version = ?", touched
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to update the scan cache access times: {e}")
+
+    def put(self, digest: str, kind: str, result: dict) -> None:
+        data = json.dumps(result, default=str)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scan (digest, kind, version, result, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (digest, kind, self.version, data, len(data), time.time())
+        )
+        self.conn.commit()
+        self._total += len(data)
+        self._puts += 1
+        if self._total > self.max_size or self._puts % EVICT_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        self.flush_touches()
+        self._total = self.stored_size()
+        if self._total <= self.max_size:
+            return
+        target = int(self.max_size * EVICT_TARGET)
+        remove_rows = []
+        for rowid, size in self.conn.execute("SELECT rowid, size FROM scan ORDER BY last_access"):
+            if self._total <= target:
+                break
+            remove_rows.append((rowid,))
+            self._total -= size
+        self.conn.executemany("DELETE FROM scan WHERE rowid = ?", remove_rows)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self._finalizer()
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+scan_cache: Optional[ScanCache] = ScanCache()
+
+
+def configure_scan_cache(cache_dir: Optional[str] = None, enabled: bool = True) -> None:
+    global scan_cache
+    if scan_cache is not None:
+        scan_cache.close()
+    if enabled:
+        scan_cache = ScanCache(cache_dir if cache_dir else DEFAULT_CACHE_DIR)
+    else:
+        scan_cache = None
+
+
+def scan_cache_args() -> tuple:
+    # configure_scan_cache arguments of the current setting, for the initializer of worker processes:
+    # with the spawn and forkserver start methods they import this module again and start with the default
+    if scan_cache is None:
+        return (None, False)
+    return (scan_cache.cache_dir, True)
+
+
+def file_sha256(path: str) -> str:
+    algo = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            algo.update(chunk)
+    return algo.hexdigest()
+
+
+def cached_scan(path: str, kind: str, scan: Callable[[], dict]) -> dict:
+    if scan_cache is None:
+        return scan()
+    try:
+        digest = file_sha256(path)
+        result = scan_cache.get(digest, kind)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Scan cache is unavailable for {path}: {e}")
+        return scan()
+    if result is None:
+        result = scan()
+        try:
+            scan_cache.put(digest, kind, result)
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to save scan result of {path}: {e}")
+    return result
+
+
+# scancode is imported on the first scan, it takes seconds to load its license index
+def scan_licenses(path: str, include_text: bool = False, unknown_licenses: bool = False) -> dict:
+    from scancode.api import get_licenses
+    return cached_scan(
+        path,
+        f"licenses(include_text={include_text},unknown_licenses={unknown_licenses})",
+        lambda: get_licenses(path, include_text=include_text, unknown_licenses=unknown_licenses)
+    )
+
+
+def scan_copyrights(path: str) -> dict:
+    from scancode.api import get_copyrights
+    return cached_scan(path, "copyrights", lambda: get_copyrights(path))
+
+
+def scan_file_info(path: str) -> dict:
+    from scancode.api import get_file_info
+    return cached_scan(path, "file_info", lambda: get_file_info(path))
@@ -1,16 +1,19 @@
 import os
 import ast
-import pandas as pd
+import csv
 import re
+import functools
 from uuid import uuid4
-import pkg_resources
 import logging
-import sys
+import importlib.metadata
 from packageurl import PackageURL
 from packageurl.contrib import url2purl
-from typing import Optional, List
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from typing import Optional, List, Tuple
 from ....output import middleware
 from ....schema.cdx_model import spdx
+from ....output.enum_lookup import enum_value_set
 
 
 ALGOLIST = [
@@ -35,7 +38,23 @@ ALGOLIST = [
 
 P2I_FILE = os.path.join(os.path.dirname(__file__), "data", "p2i.csv")
 
-p2idf = pd.read_csv(P2I_FILE)
+
+@functools.lru_cache(maxsize=None)
+def load_p2i() -> Tuple[dict, dict]:
+    # package -> imports and import -> packages, loaded from p2i.csv on first use
+    pkg2imports = {}
+    import2pkgs = {}
+    with open(P2I_FILE, "r", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 2 or not row[0] or not row[1]:
+                continue
+            pkg2imports.setdefault(row[0], set()).add(row[1])
+            import2pkgs.setdefault(row[1], set()).add(row[0])
+    pkg2imports = {pkg: frozenset(imports) for pkg, imports in pkg2imports.items()}
+    import2pkgs = {imp: frozenset(pkgs) for imp, pkgs in import2pkgs.items()}
+    return pkg2imports, import2pkgs
 
 
 def component_meta_template() -> dict:
@@ -50,7 +69,7 @@ def component_meta_template() -> dict:
 def str2license(license_str: Optional[str]) -> Optional[List[middleware.License]]:
     if not license_str:
         return None
-    if license_str in [member.value for member in spdx.Schema]:
+    if license_str in enum_value_set(spdx.Schema):
         pkg_license = middleware.License(type='concluded', spdxID=license_str)
     else:
         pkg_license = middleware.License(type='concluded', name=license_str)
@@ -121,17 +140,17 @@ def lib_extraction(line: str) -> Optional[str]:
 
 
 def get_packages(import_name: str) -> set:
-    pkgs = set(p2idf[p2idf['import']==import_name]['package'].values)
-    if len(pkgs) > 0:
-        return pkgs
+    pkgs = load_p2i()[1].get(import_name, None)
+    if pkgs:
+        return set(pkgs)
     else:
         return None
 
 
 def get_imports(package_name: str) -> set:
-    imports = set(p2idf[p2idf['package']==package_name]['import'].values)
-    if len(imports) > 0:
-        return imports
+    imports = load_p2i()[0].get(package_name, None)
+    if imports:
+        return set(imports)
     else:
         s = set()
         s.add(package_name)
@@ -204,23 +223,35 @@ def analyze_imports(source_code: str) -> tuple:
     return analyzer.all_imports, analyzer.conditional_imports
 
 
-def get_deps_from_pip(package_name: str, site_packages_path: str) -> dict:
-    if os.path.exists(site_packages_path):
-        sys.path.insert(0, site_packages_path)
-    else:
-        raise ValueError(f"Site-packages path not found: {site_packages_path}")    
-    pkg_resources.working_set = pkg_resources.WorkingSet(sys.path)
-    
-    pkg2import_pkgs = {}
-    for pkg in package_name:
-        try:
-            distribution = pkg_resources.get_distribution(pkg)
-            dependencies = distribution.requires()
-            pkg2import_pkgs[pkg] = [dependency.project_name for dependency in dependencies]
-        except:
-            pkg2import_pkgs[pkg] = []
-    
-    return pkg2import_pkgs
+@functools.lru_cache(maxsize=8)
+def pip_requires_index(site_packages_path: str, mtime: int) -> dict:
+    # canonical distribution name -> names of its requirements, read from the dist-info and
+    # egg-info metadata of site_packages_path only. mtime is the one of the directory, so the
+    # index is rebuilt once packages are installed or removed
+    index = {}
+    for dist in importlib.metadata.distributions(path=[site_packages_path]):
+        name = dist.metadata.get("Name")
+        if not name or canonicalize_name(name) in index:
+            continue
+        requires = []
+        for requirement in dist.requires or []:
+            try:
+                requirement = Requirement(requirement)
+            except InvalidRequirement:
+                continue
+            # like pkg_resources, requirements of extras and those with markers that don't hold are skipped
+            if requirement.marker and not requirement.marker.evaluate({"extra": ""}):
+                continue
+            requires.append(normalize_pkgname(requirement.name))
+        index[canonicalize_name(name)] = list(dict.fromkeys(requires))
+    return index
+
+
+def get_deps_from_pip(package_name: List[str], site_packages_path: str) -> dict:
+    if not os.path.exists(site_packages_path):
+        raise ValueError(f"Site-packages path not found: {site_packages_path}")
+    index = pip_requires_index(site_packages_path, os.stat(site_packages_path).st_mtime_ns)
+    return {pkg: list(index.get(canonicalize_name(pkg), [])) for pkg in package_name}
 
 
 def pyfile_depends(path: str) -> tuple:
@@ -1,22 +1,108 @@
-from typing import List
-import json
+from typing import List, Iterable, Optional
 import warnings
+from collections import deque
 from uuid import uuid4
 from datetime import datetime
 from packageurl import PackageURL
 from ...output import middleware
-from ..util.utils import Util
+from ..util.utils import Util, RelationshipIndex
+from ..util.bom_reader import read_bom
+
+
+def dep_children(relations: RelationshipIndex, comp_id: str) -> set:
+    # dependencies of comp_id in the relationships as they are before its own are removed
+    children = set()
+    for rel in relations.from_source(comp_id):
+        if rel.type == "DEPENDS_ON":
+            children.add(rel.targetID)
+    for rel in relations.to_target(comp_id):
+        if rel.type == "DEPENDENCY_OF":
+            children.add(rel.sourceID)
+    return children
+
+
+def load_sbom(path: str) -> middleware.Middleware:
+    try:
+        bom = read_bom(path)
+    except:
+        raise Exception("Only JSON format is supported for merging SBOMs")
+    return Util.choose_model(bom)
+
+
+class ComponentIndex:
+    # ordered component list indexed by ID and by name. Components are numbered in insertion order,
+    # so removing one does not shift the others and the indexes stay valid across merges
+    def __init__(self, components: Optional[Iterable[middleware.Component]] = None) -> None:
+        self._comps = {}
+        self._seq = 0
+        self._by_id = {}
+        self._by_name = {}
+        if components:
+            self.extend(components)
+
+    def __getitem__(self, seq: int) -> middleware.Component:
+        return self._comps[seq]
+
+    def append(self, comp: middleware.Component) -> None:
+        self._comps[self._seq] = comp
+        self._by_id.setdefault(comp.ID, {})[self._seq] = None
+        self._by_name.setdefault(comp.name, {})[self._seq] = None
+        self._seq += 1
+
+    def extend(self, components: Iterable[middleware.Component]) -> None:
+        for comp in components:
+            self.append(comp)
+
+    def remove(self, seq: int) -> None:
+        comp = self._comps.pop(seq)
+        for index, key in ((self._by_id, comp.ID), (self._by_name, comp.name)):
+            seqs = index[key]
+            del seqs[seq]
+            if not seqs:
+                del index[key]
+
+    def with_id(self, comp_id: str) -> List[int]:
+        return list(self._by_id.get(comp_id, {}))
+
+    def first_with_id(self, comp_id: str) -> Optional[int]:
+        return next(iter(self._by_id.get(comp_id, {})), None)
+
+    def first_with_name(self, name: Optional[str]) -> Optional[int]:
+        return next(iter(self._by_name.get(name, {})), None)
+
+    def last_with_id(self, comp_id: str) -> middleware.Component:
+        return self._comps[next(reversed(self._by_id[comp_id]))]
+
+    def to_list(self) -> List[middleware.Component]:
+        return list(self._comps.values())
 
 
 class Merge_SBOM:
-    def __init__(self, input: List[str]) -> None:
+    def __init__(self, input: List[str], jobs: int = 1) -> None:
         self.input = input
+        self.jobs = jobs
     
     def merge_midware(
         self, 
         root_midware: middleware.Middleware, 
         sub_midware: middleware.Middleware
     ) -> middleware.Middleware:
+        components = ComponentIndex(root_midware.components)
+        relations = RelationshipIndex(root_midware.relationship)
+        self.merge_into(root_midware, components, relations, sub_midware)
+        root_midware.components = components.to_list()
+        root_midware.relationship = relations.to_list()
+        return root_midware
+
+    def merge_into(
+        self,
+        root_midware: middleware.Middleware,
+        components: ComponentIndex,
+        relations: RelationshipIndex,
+        sub_midware: middleware.Middleware
+    ) -> None:
+        # merges sub_midware into root_midware, whose components and relationships are held in the
+        # indexes until the last sub-SBOM is merged
         root_midware.doc_name = f"{root_midware.doc_name}(merged with {sub_midware.doc_name})"
         if root_midware.bom_version:
             root_midware.bom_version += 1
@@ -67,63 +153,56 @@ class Merge_SBOM:
                 annotations.append(anno)
             root_midware.annotations = annotations
         
-        root_comps = {}
-        if root_midware.components:
-            for comp in root_midware.components:
-                root_comps[comp.ID] = comp
-        
         sub_comps = {}
         sub_compID_list = []
+        sub_compID_index = {}
         if sub_midware.components:
-            for comp in sub_midware.components:
+            for i, comp in enumerate(sub_midware.components):
                 sub_comps[comp.ID] = comp
                 sub_compID_list.append(comp.ID)
+                sub_compID_index.setdefault(comp.ID, i)
         
-        root_root, root_dep = Util.construct_dep_tree(root_midware.relationship)
-        sub_root, sub_dep = Util.construct_dep_tree(sub_midware.relationship)
+        sub_root = Util.dep_graph(sub_midware.relationship).roots()
 
         # 在root中的relationship，移除所有与sub树节点有关的依赖关系，删除只存在于sub树中的节点，
         # 对于与其他节点之间存在依赖关系的节点，只删除依赖关系，不删除节点；
         # 根据sub树，在root树中替换所有重复的节点，添加sub树中引入的新节点，重新构建所有依赖关系
-                
-        components = root_midware.components if root_midware.components else []
-        relations = root_midware.relationship if root_midware.relationship else []
         
-        # 构建sub树中所有节点到root树中节点的映射
+        # 构建sub树中所有节点到root树中节点的映射，匹配ID或name相同的第一个root节点
         sub2root_comp = []
-        for comp in sub_midware.components:
-            flag = False
-            for root_comp in root_midware.components:
-                if comp.ID == root_comp.ID or comp.name == root_comp.name:
-                    if comp.version != root_comp.version:
-                        warnings.warn(f"Component {comp.name} has different versions in two SBOMs", UserWarning)
-                    sub2root_comp.append(root_comp.ID)
-                    flag = True
-                    break
-            if not flag:
+        # root节点ID -> 第一个映射到它的sub节点下标
+        root2sub_index = {}
+        for i, comp in enumerate(sub_midware.components if sub_midware.components else []):
+            matches = [index for index in (components.first_with_id(comp.ID), components.first_with_name(comp.name)) if index is not None]
+            if not matches:
                 sub2root_comp.append(None)
+                continue
+            root_comp = components[min(matches)]
+            if comp.version != root_comp.version:
+                warnings.warn(f"Component {comp.name} has different versions in two SBOMs", UserWarning)
+            sub2root_comp.append(root_comp.ID)
+            root2sub_index.setdefault(root_comp.ID, i)
         
         # 从root树中删除所有sub子树相关的依赖关系
         # sub_tree_nodes记录root树中所有以sub树根节点为树根的子树中所包含的节点
         sub_tree_nodes = set()
         if sub_root:
             for sub_root_node in sub_root:
-                comp_node = sub2root_comp[sub_compID_list.index(sub_root_node)]
+                comp_node = sub2root_comp[sub_compID_index[sub_root_node]]
                 if not comp_node:
                     continue
-                que = [(comp_node, root_dep.get(comp_node, []))]
+                que = deque([(comp_node, dep_children(relations, comp_node))])
                 while que:
-                    cur = que.pop(0)
+                    cur = que.popleft()
                     sub_tree_nodes.add(cur[0])
 
                     remove_rels = []
-                    for rel in relations:
-                        if rel.type == "DEPENDS_ON":
-                            if rel.sourceID == cur[0] and rel.targetID in cur[1]:
-                                remove_rels.append(rel)
-                        elif rel.type == "DEPENDENCY_OF":
-                            if rel.targetID == cur[0] and rel.sourceID in cur[1]:
-                                remove_rels.append(rel)
+                    for rel in relations.from_source(cur[0]):
+                        if rel.type == "DEPENDS_ON" and rel.targetID in cur[1]:
+                            remove_rels.append(rel)
+                    for rel in relations.to_target(cur[0]):
+                        if rel.type == "DEPENDENCY_OF" and rel.sourceID in cur[1]:
+                            remove_rels.append(rel)
                     for rel in remove_rels:
                         relations.remove(rel)
                     for comp in cur[1]:
@@ -131,46 +210,52 @@ class Merge_SBOM:
                             continue
                         else:
                             sub_tree_nodes.add(comp)
-                            que.append((comp, root_dep.get(comp, [])))
+                            que.append((comp, dep_children(relations, comp)))
             
         # 删除只存在于旧sub树中的节点
         # 为什么要分1、2、0？
         # 0表示孤悬节点，可以直接删除；1表示只在依赖树中出现过；2表示在其他关系中出现过，不可以随便删除
         sub_tree_nodes = list(sub_tree_nodes)
         vis_sub_tree_nodes = [0 for _ in range(len(sub_tree_nodes))]
-        for node in sub_tree_nodes:
-            for rel in relations:
+        for i, node in enumerate(sub_tree_nodes):
+            for rel in relations.from_source(node) + relations.to_target(node):
                 if rel.type == "DEPENDS_ON":
                     if rel.targetID == node:
-                        if vis_sub_tree_nodes[sub_tree_nodes.index(node)] == 0:
-                            vis_sub_tree_nodes[sub_tree_nodes.index(node)] = 1
+                        if vis_sub_tree_nodes[i] == 0:
+                            vis_sub_tree_nodes[i] = 1
                 elif rel.type == "DEPENDENCY_OF":
                     if rel.sourceID == node:
-                        if vis_sub_tree_nodes[sub_tree_nodes.index(node)] == 0:
-                            vis_sub_tree_nodes[sub_tree_nodes.index(node)] = 1
-                elif rel.sourceID == node or rel.targetID == node:
-                    vis_sub_tree_nodes[sub_tree_nodes.index(node)] = 2
+                        if vis_sub_tree_nodes[i] == 0:
+                            vis_sub_tree_nodes[i] = 1
+                else:
+                    vis_sub_tree_nodes[i] = 2
         
         remove_nodes = []
         for i, node in enumerate(sub_tree_nodes):
-            if node in sub2root_comp:
-                sub_node = sub_comps[sub_compID_list[sub2root_comp.index(node)]]
+            if node in root2sub_index:
+                sub_node = sub_comps[sub_compID_list[root2sub_index[node]]]
                 if node == sub_node.ID:
-                    components.remove(root_comps[node])
                     remove_nodes.append(node)
                     continue
             if vis_sub_tree_nodes[i] == 0:
-                components.remove(root_comps[node])
                 remove_nodes.append(node)
             elif vis_sub_tree_nodes[i] == 1:
-                if node in sub2root_comp:
-                    components.remove(root_comps[node])
+                if node in root2sub_index:
                     remove_nodes.append(node)
             elif vis_sub_tree_nodes[i] == 2:
-                if node in sub2root_comp:
-                    if root_comps[node].ID == sub_node.ID and root_comps[node].name == sub_node.name and root_comps[node].version == sub_node.version:
-                        components.remove(root_comps[node])
+                if node in root2sub_index:
+                    root_comp = components.last_with_id(node)
+                    if root_comp.ID == sub_node.ID and root_comp.name == sub_node.name and root_comp.version == sub_node.version:
                         remove_nodes.append(node)
+        # 与list.remove相同，删除第一个与之相等的节点，最后一次性过滤
+        remove_index = set()
+        for node in remove_nodes:
+            root_comp = components.last_with_id(node)
+            remove_index.add(next(
+                i for i in components.with_id(node) if i not in remove_index and components[i] == root_comp
+            ))
+        for i in remove_index:
+            components.remove(i)
         
         # 不一定bom里面所有的节点都在树里面
         # 将sub树中的节点加入到root树中
@@ -182,37 +267,30 @@ class Merge_SBOM:
                 components.append(sub_comps[sub_comp_id])
         
         # 重新构建依赖关系
-        for rel in relations:
-            for node in remove_nodes:
-                if rel.sourceID == node:
-                    rel.sourceID = sub_compID_list[sub2root_comp.index(node)]
-                if rel.targetID == node:
-                    rel.targetID = sub_compID_list[sub2root_comp.index(node)]
+        for node in remove_nodes:
+            if node in root2sub_index:
+                relations.rename(node, sub_compID_list[root2sub_index[node]])
         
         if sub_midware.relationship:
             for rel in sub_midware.relationship:
-                flag = False
-                for root_rel in relations:
-                    if rel.type == root_rel.type and rel.sourceID == root_rel.sourceID and rel.targetID == root_rel.targetID:
-                        flag = True
-                        break
-                if not flag:
-                    relations.append(rel)
-        
-        root_midware.components = components
-        root_midware.relationship = relations
-        return root_midware
+                relations.add(rel)
     
-    def merge_sbom(self) -> middleware.Middleware:
-        boms = []
-        for bom_path in self.input:
-            try:
-                boms.append(json.load(open(bom_path, "r")))
-            except:
-                raise Exception("Only JSON format is supported for merging SBOMs")
-        
-        root_midware = Util.choose_model(boms[0])
-        sub_midware = Util.choose_model(boms[1])
-        merged_midware = self.merge_midware(root_midware, sub_midware)
+    def merge_midwares(self, midwares: List[middleware.Middleware]) -> middleware.Middleware:
+        # the sub-SBOMs are merged into the root one by one in the given order, same as chained
+        # invocations. The root is indexed once, the indexes are updated by every merge
+        merged_midware = midwares[0]
+        components = ComponentIndex(merged_midware.components)
+        relations = RelationshipIndex(merged_midware.relationship)
+        for sub_midware in midwares[1:]:
+            self.merge_into(merged_midware, components, relations, sub_midware)
+        merged_midware.components = components.to_list()
+        merged_midware.relationship = relations.to_list()
         return merged_midware
+    
+    def merge_sbom(self) -> middleware.Middleware:
+        if len(self.input) < 2:
+            raise Exception("At least 2 SBOMs are required for merging")
+        # inputs are loaded and converted to middleware in worker processes
+        midwares = Util.parallel_map(load_sbom, [(bom_path,) for bom_path in self.input], self.jobs)
+        return self.merge_midwares(midwares)
 
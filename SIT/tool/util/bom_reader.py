@@ -0,0 +1,226 @@
+from typing import Any, Iterator, Optional, Tuple, Type, Union, get_args, get_origin
+import os
+import json
+import re
+from pydantic import BaseModel, TypeAdapter
+
+
+# top-level arrays of CycloneDX, SPDX, OSSBOM and middleware documents that are read element by element
+LAZY_KEYS = {
+    "components", "dependencies", "packages", "files", "snippets", "relationships", "relationship",
+    "PackageInformation", "InnerInformation", "RelationshipInformation",
+}
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\n\r"
+
+# members that identify the format of a document, looked up in its first SNIFF_SIZE bytes
+SNIFF_SIZE = 1 << 16
+FORMAT_MARKERS = {
+    "cyclonedx": (rb'"bomFormat"\s*:\s*"CycloneDX"', rb'"specVersion"\s*:\s*"1\.6"'),
+    "spdx": (rb'"spdxVersion"\s*:\s*"SPDX-2\.3"',),
+    "ossbom": (rb'"DocumentFormat"\s*:\s*"OSSBOM"', rb'"DocumentVersion"\s*:\s*"1\.0"'),
+    "middleware": (rb'"type"\s*:\s*"Middleware"',),
+}
+# above this size CycloneDX, SPDX and OSSBOM documents are converted element by element, which is
+# faster and uses less memory than validating the whole document with its schema model first
+RAW_MAX_SIZE = 1 << 21
+
+
+class JSONScanner:
+    # incremental scanner over a JSON text file, values are decoded one at a time with the C decoder
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "r", encoding="utf-8")
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def fill(self, size: int = CHUNK_SIZE) -> None:
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+            self.fill()
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"Expecting one of '{chars}' in JSON document, got '{ch}'")
+        self.pos += 1
+        return ch
+
+    def value(self) -> Any:
+        self.peek()
+        size = CHUNK_SIZE
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(size)
+            size *= 2
+
+    def items(self, lazy_keys: set = LAZY_KEYS) -> Iterator[Tuple[str, bool, Any]]:
+        # yields (key, False, value) for ordinary members and (key, True, element) for each
+        # element of a lazy array; an empty lazy array yields (key, True, JSONScanner)
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key in lazy_keys and self.peek() == "[":
+                self.expect("[")
+                if self.peek() == "]":
+                    self.expect("]")
+                    yield key, True, JSONScanner
+                else:
+                    while True:
+                        yield key, True, self.value()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                yield key, False, self.value()
+            if self.expect(",}") == "}":
+                return
+
+
+class JSONArrayReader:
+    # a top-level array of a JSON file, each iteration reads the file again and validates the
+    # elements one by one, so only one element is held in memory at a time
+    def __init__(self, path: str, key: str, count: int, item_type: Optional[Any] = None) -> None:
+        self.path = path
+        self.key = key
+        self.count = count
+        self.item_type = item_type
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def validated(self, item_type: Any) -> "JSONArrayReader":
+        return JSONArrayReader(self.path, self.key, self.count, item_type)
+
+    def __iter__(self) -> Iterator[Any]:
+        adapter = TypeAdapter(self.item_type) if self.item_type is not None else None
+        scanner = JSONScanner(self.path)
+        try:
+            # the other large arrays are skipped element by element as well
+            seen = False
+            for key, is_element, value in scanner.items(LAZY_KEYS | {self.key}):
+                if key != self.key or not is_element:
+                    if seen:
+                        return
+                    continue
+                seen = True
+                if value is JSONScanner:
+                    return
+                yield adapter.validate_python(value) if adapter else value
+        finally:
+            scanner.close()
+
+
+class RawBOM:
+    # the undecoded bytes of a document whose format was recognized by sniff_format, validated
+    # straight from JSON so that no intermediate dict of the whole document is built
+    def __init__(self, format: str, data: bytes) -> None:
+        self.format = format
+        self.data = data
+
+    def validate(self, model: Type[BaseModel]) -> BaseModel:
+        return model.model_validate_json(self.data)
+
+
+def sniff_format(prefix: bytes) -> Optional[str]:
+    # the format whose markers are all in prefix, None if there is no such format or more than one
+    if not prefix.lstrip(b"\xef\xbb\xbf \t\n\r").startswith(b"{"):
+        return None
+    formats = [
+        format for format, markers in FORMAT_MARKERS.items()
+        if all(re.search(marker, prefix) for marker in markers)
+    ]
+    return formats[0] if len(formats) == 1 else None
+
+
+def read_bom(path: str) -> Union[RawBOM, dict]:
+    # middleware documents and small documents of the other formats are read as bytes, the rest
+    # (and documents with the format members after a large array) go through scan_bom
+    with open(path, "rb") as f:
+        format = sniff_format(f.read(SNIFF_SIZE))
+        if format is None or (format != "middleware" and os.fstat(f.fileno()).st_size > RAW_MAX_SIZE):
+            return scan_bom(path)
+        f.seek(0)
+        return RawBOM(format, f.read())
+
+
+def scan_bom(path: str) -> dict:
+    # top-level members of the document, with large arrays replaced by JSONArrayReader
+    bom = {}
+    scanner = JSONScanner(path)
+    try:
+        for key, is_element, value in scanner.items():
+            if is_element:
+                reader = bom.setdefault(key, JSONArrayReader(path, key, 0))
+                if value is not JSONScanner:
+                    reader.count += 1
+            else:
+                bom[key] = value
+    finally:
+        scanner.close()
+    return bom
+
+
+def list_item_type(annotation: Any) -> Optional[Any]:
+    if get_origin(annotation) is list:
+        return get_args(annotation)[0]
+    for arg in get_args(annotation):
+        item_type = list_item_type(arg)
+        if item_type is not None:
+            return item_type
+    return None
+
+
+def validate_document(model: Type[BaseModel], bom_dic: dict, materialize: bool = False) -> BaseModel:
+    # same as model(**bom_dic), except that JSONArrayReader members are validated element by element
+    # when they are iterated (or right away into lists if materialize is set)
+    if isinstance(bom_dic, RawBOM):
+        return bom_dic.validate(model)
+    lazy = {key: value for key, value in bom_dic.items() if isinstance(value, JSONArrayReader)}
+    if not lazy:
+        return model(**bom_dic)
+    fields = {}
+    for name, field in model.model_fields.items():
+        fields[field.alias if field.alias else name] = (name, field)
+    head = {key: value for key, value in bom_dic.items() if key not in lazy}
+    arrays = {}
+    for key, reader in lazy.items():
+        if key not in fields:
+            raise ValueError(f"Unexpected field '{key}' in {model.__name__}")
+        name, field = fields[key]
+        arrays[name] = reader.validated(list_item_type(field.annotation))
+        if materialize:
+            head[key] = list(arrays[name])
+    if materialize:
+        return model(**head)
+    doc = model(**head)
+    for name, reader in arrays.items():
+        setattr(doc, name, reader if reader else None)
+    return doc
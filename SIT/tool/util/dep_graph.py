@@ -0,0 +1,77 @@
+from typing import Iterable, List, Optional
+import numpy as np
+from ...output import middleware
+
+
+class CSRDepGraph:
+    # dependency graph with component IDs interned to integers and the edges stored as CSR
+    # offset/target arrays, in both directions. IDs are numbered in the order construct_dep_tree
+    # first sees them, so roots() returns the same list as construct_dep_tree
+    def __init__(self, relations: Optional[Iterable[middleware.Relationship]] = None) -> None:
+        self.ids = []
+        self.index = {}
+        parents = []
+        children = []
+        for rel in relations if relations else []:
+            if rel.type == "DEPENDS_ON":
+                parent, child = rel.sourceID, rel.targetID
+            elif rel.type == "DEPENDENCY_OF":
+                parent, child = rel.targetID, rel.sourceID
+            else:
+                continue
+            children.append(self.intern(child))
+            parents.append(self.intern(parent))
+        parents = np.array(parents, dtype=np.int64)
+        children = np.array(children, dtype=np.int64)
+        self.offsets, self.targets = self.csr(parents, children)
+        self.rev_offsets, self.rev_targets = self.csr(children, parents)
+
+    def intern(self, comp_id: str) -> int:
+        node = self.index.get(comp_id)
+        if node is None:
+            node = self.index[comp_id] = len(self.ids)
+            self.ids.append(comp_id)
+        return node
+
+    def csr(self, sources: np.ndarray, targets: np.ndarray) -> tuple:
+        # a stable sort keeps the edges of every node in relationship order
+        offsets = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.ids)), out=offsets[1:])
+        return offsets, targets[np.argsort(sources, kind="stable")]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def roots(self) -> List[str]:
+        # components that are not a dependency of any other component
+        return [self.ids[i] for i in np.flatnonzero(np.diff(self.rev_offsets) == 0).tolist()]
+
+    def leaves(self) -> List[str]:
+        # components without dependencies
+        return [self.ids[i] for i in np.flatnonzero(np.diff(self.offsets) == 0).tolist()]
+
+    def children(self, comp_id: str) -> List[str]:
+        node = self.index.get(comp_id)
+        if node is None:
+            return []
+        return [self.ids[i] for i in self.targets[self.offsets[node]:self.offsets[node + 1]].tolist()]
+
+    def closure(self, comp_ids: Iterable[str]) -> set:
+        # comp_ids and everything they depend on, the BFS expands a whole frontier per step
+        result = set(comp_ids)
+        visited = np.zeros(len(self.ids), dtype=bool)
+        frontier = np.array([self.index[comp_id] for comp_id in result if comp_id in self.index], dtype=np.int64)
+        visited[frontier] = True
+        while frontier.size:
+            starts = self.offsets[frontier]
+            lengths = self.offsets[frontier + 1] - starts
+            total = int(lengths.sum())
+            if not total:
+                break
+            # positions of all the children of the frontier in self.targets
+            positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+            frontier = np.unique(self.targets[positions])
+            frontier = frontier[~visited[frontier]]
+            visited[frontier] = True
+        result.update(self.ids[i] for i in np.flatnonzero(visited).tolist())
+        return result
@@ -1,7 +1,17 @@
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+import sys
 import json
+import heapq
 import hashlib
-from ...output import middleware, cdx_conversion, spdx_conversion, ossbom_conversion
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+from ...output import middleware
+from .bom_reader import RawBOM, read_bom, validate_document
+
+
+CSR_MIN_RELATIONS = 100000
 
 
 class Util:
@@ -44,47 +54,433 @@ class Util:
         return root_comp, dep_tree
 
     @staticmethod
-    def choose_model(bom_dic: dict) -> middleware.Middleware:
-        if bom_dic.get("bomFormat", None) == "CycloneDX":
-            return cdx_conversion.Cdx2Middleware(bom_dic).cdx2middleware()
+    def dep_graph(relations: Optional[List[middleware.Relationship]], min_csr_size: int = CSR_MIN_RELATIONS):
+        # dict based tree for small SBOMs, numpy CSR arrays once the relationships get large
+        if relations and len(relations) >= min_csr_size:
+            from .dep_graph import CSRDepGraph
+            return CSRDepGraph(relations)
+        return DepTree(relations)
+
+    @staticmethod
+    def parallel_map(
+        func: Callable,
+        args_list: List[tuple],
+        jobs: int = 1,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = ()
+    ) -> List[Any]:
+        # results keep the order of args_list, so callers can merge them deterministically.
+        # initializer(*initargs) runs once in every worker process
+        if jobs <= 1 or len(args_list) <= 1:
+            return [func(*args) for args in args_list]
+        chunksize = max(1, len(args_list) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+            return list(executor.map(func, *zip(*args_list), chunksize=chunksize))
+
+    @staticmethod
+    def choose_model(bom_dic: Union[dict, RawBOM]) -> middleware.Middleware:
+        # conversion modules (and their large schema models) are imported on first use
+        if isinstance(bom_dic, RawBOM):
+            bom_format = bom_dic.format
+        elif bom_dic.get("bomFormat", None) == "CycloneDX":
+            bom_format = "cyclonedx"
         elif bom_dic.get("spdxVersion", None) == "SPDX-2.3":
-            return spdx_conversion.Spdx2Middleware(bom_dic).spdx2middleware()
+            bom_format = "spdx"
         elif bom_dic.get("DocumentInformation", {}).get("DocumentFormat", None) == "OSSBOM":
-            return ossbom_conversion.Ossbom2Middleware(bom_dic).ossbom2middleware()
+            bom_format = "ossbom"
         elif bom_dic.get("type", None) == "Middleware":
-            return middleware.Middleware(**bom_dic)
+            bom_format = "middleware"
         else:
             raise Exception("Unsupported SBOM format")
+
+        if bom_format == "cyclonedx":
+            from ...output import cdx_conversion
+            return cdx_conversion.Cdx2Middleware(bom_dic).cdx2middleware()
+        elif bom_format == "spdx":
+            from ...output import spdx_conversion
+            return spdx_conversion.Spdx2Middleware(bom_dic).spdx2middleware()
+        elif bom_format == "ossbom":
+            from ...output import ossbom_conversion
+            return ossbom_conversion.Ossbom2Middleware(bom_dic).ossbom2middleware()
+        else:
+            return validate_document(middleware.Middleware, bom_dic, materialize=True)
+
+    @staticmethod
+    def load_model(path: str) -> middleware.Middleware:
+        # documents of a known format are validated straight from the file bytes, the others are
+        # read and converted element by element
+        return Util.choose_model(read_bom(path))
     
     @staticmethod
     def convert2model(midware: middleware.Middleware, model: str) -> dict:
         if model == "cyclonedx":
+            from ...output import cdx_conversion
             return cdx_conversion.Middleware2Cdx(midware).middleware2cdx()
         elif model == "spdx":
+            from ...output import spdx_conversion
             return spdx_conversion.Middleware2Spdx(midware).middleware2spdx()
         elif model == "ossbom":
+            from ...output import ossbom_conversion
             return ossbom_conversion.Middleware2Ossbom(midware).middleware2ossbom()
         elif model == "middleware":
             return midware.model_dump(mode='json', exclude_none=True)
     
+    @staticmethod
+    def serialize_model(midware: middleware.Middleware, model: str, indent: Optional[int] = 4) -> bytes:
+        # like convert2model, but the output model is serialized to JSON bytes by pydantic-core
+        if model == "cyclonedx":
+            from ...output import cdx_conversion
+            return cdx_conversion.Middleware2Cdx(midware).middleware2cdx_json(indent)
+        elif model == "spdx":
+            from ...output import spdx_conversion
+            return spdx_conversion.Middleware2Spdx(midware).middleware2spdx_json(indent)
+        elif model == "ossbom":
+            from ...output import ossbom_conversion
+            return ossbom_conversion.Middleware2Ossbom(midware).middleware2ossbom_json(indent)
+        elif model == "middleware":
+            return midware.__pydantic_serializer__.to_json(midware, indent=indent, exclude_none=True)
+
+    @staticmethod
+    def output_model(midware: middleware.Middleware, model: str) -> Tuple[BaseModel, bool]:
+        # the output model and whether it is dumped by alias, as in convert2model
+        if model == "cyclonedx":
+            from ...output import cdx_conversion
+            return cdx_conversion.Middleware2Cdx(midware).middleware2cdx_model(), True
+        elif model == "spdx":
+            from ...output import spdx_conversion
+            return spdx_conversion.Middleware2Spdx(midware).middleware2spdx_model(), True
+        elif model == "ossbom":
+            from ...output import ossbom_conversion
+            return ossbom_conversion.Middleware2Ossbom(midware).middleware2ossbom_model(), False
+        elif model == "middleware":
+            return midware, False
+        raise Exception("Unsupported model")
+
+    @staticmethod
+    def stream_model(midware: middleware.Middleware, model: str) -> dict:
+        # like convert2model, but the elements of the top-level arrays (components, packages, files,
+        # relationships, ...) are dumped one by one while writing
+        bom, by_alias = Util.output_model(midware, model)
+        out_bom = {}
+        for key, value in model_items(bom, by_alias):
+            if isinstance(value, list):
+                out_bom[key] = JSONStream(to_jsonable_python(item, by_alias=by_alias, exclude_none=True) for item in value)
+            else:
+                out_bom[key] = to_jsonable_python(value, by_alias=by_alias, exclude_none=True)
+        return out_bom
+    
     @staticmethod
     def toHash(path: str) -> str:
         algo = hashlib.sha256()
         with open(path, "rb") as f:
-            algo.update(f.read())
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                algo.update(chunk)
         sbom_hash = algo.hexdigest()
         return sbom_hash
     
     @staticmethod
-    def make_output(midware: middleware.Middleware, model: str, output: str) -> None:
-        out_bom = Util.convert2model(midware, model)
+    def make_output(
+        midware: middleware.Middleware,
+        model: str,
+        output: str,
+        indent: Optional[int] = 4,
+        legacy_json: bool = False
+    ) -> Optional[str]:
+        # write the SBOM in a single pass, hashing the same bytes, and return the SHA-256 of the file.
+        # The top-level arrays of the output model are serialized one element at a time, so only the
+        # output model is held in memory, not its dump. legacy_json writes it with the json module,
+        # byte for byte as json.dumps (non-ASCII characters escaped), otherwise pydantic-core
+        # serializes the elements straight to bytes
+        if legacy_json:
+            chunks = (chunk.encode() for chunk in iter_json(Util.stream_model(midware, model), indent))
+        else:
+            bom, by_alias = Util.output_model(midware, model)
+            chunks = iter_model_json(bom, indent, by_alias)
         
         if output == "-":
-            print(json.dumps(out_bom, indent=4))
+            sys.stdout.flush()
+            for data in buffered(chunks):
+                sys.stdout.buffer.write(data)
+            sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
+            return None
+        
+        algo = hashlib.sha256()
+        with open(output, "wb") as f:
+            for data in buffered(chunks):
+                f.write(data)
+                algo.update(data)
+        bom_hash = algo.hexdigest()
+        fw = open(output + ".sha256", "w")
+        fw.write(f"sha256: {bom_hash}")
+        fw.close()
+        return bom_hash
+
+
+class JSONStream:
+    # a JSON array whose elements are produced lazily while the document is written
+    def __init__(self, items: Iterable) -> None:
+        self.items = items
+
+
+def iter_json(obj: Any, indent: Optional[int] = 4, level: int = 0) -> Iterator[str]:
+    # same text as json.dumps(obj, indent=indent), or the most compact form if indent is None
+    item_sep, key_sep = (",", ": ") if indent is not None else (",", ":")
+    if isinstance(obj, JSONStream):
+        items = iter(obj.items)
+        first = next(items, JSONStream)
+        if first is JSONStream:
+            yield "[]"
+            return
+        yield "["
+        newline = "\n" + " " * (indent * (level + 1)) if indent is not None else ""
+        yield newline
+        yield from iter_json(first, indent, level + 1)
+        for item in items:
+            yield item_sep + newline
+            yield from iter_json(item, indent, level + 1)
+        yield "\n" + " " * (indent * level) + "]" if indent is not None else "]"
+    elif isinstance(obj, dict) and any(isinstance(value, JSONStream) for value in obj.values()):
+        yield "{"
+        newline = "\n" + " " * (indent * (level + 1)) if indent is not None else ""
+        for i, (key, value) in enumerate(obj.items()):
+            yield (item_sep if i else "") + newline + json.dumps(str(key)) + key_sep
+            yield from iter_json(value, indent, level + 1)
+        yield "\n" + " " * (indent * level) + "}" if indent is not None else "}"
+    else:
+        chunks = json.JSONEncoder(indent=indent, separators=(item_sep, key_sep)).iterencode(obj)
+        if indent is None or level == 0:
+            yield from chunks
         else:
-            json.dump(out_bom, open(output, "w"), indent=4)
-            bom_hash = Util.toHash(output)
-            fw = open(output + ".sha256", "w")
-            fw.write(f"sha256: {bom_hash}")
-            fw.close()
+            pad = "\n" + " " * (indent * level)
+            for chunk in chunks:
+                yield chunk.replace("\n", pad)
+
+
+def model_items(bom: BaseModel, by_alias: bool = False) -> Iterator[Tuple[str, Any]]:
+    # (key, value) of the fields model_dump(exclude_none=True) writes, in the same order
+    for name, field in type(bom).model_fields.items():
+        value = getattr(bom, name)
+        if value is not None:
+            yield (field.serialization_alias or name) if by_alias else name, value
+    for name, value in (bom.__pydantic_extra__ or {}).items():
+        if value is not None:
+            yield name, value
+
+
+def iter_model_json(bom: BaseModel, indent: Optional[int] = 4, by_alias: bool = False) -> Iterator[bytes]:
+    # same bytes as bom.__pydantic_serializer__.to_json(bom, indent=indent, by_alias=by_alias, exclude_none=True),
+    # the elements of the top-level arrays are serialized one at a time. JSON strings never contain a
+    # raw newline, so nested values are indented by padding every line break
+    item_sep, key_sep = (b",", b": ") if indent is not None else (b",", b":")
+
+    def newline(level: int) -> bytes:
+        return b"\n" + b" " * (indent * level) if indent is not None else b""
+
+    def dump(value: Any, level: int) -> bytes:
+        data = to_json(value, indent=indent, by_alias=by_alias, exclude_none=True)
+        return data.replace(b"\n", newline(level)) if indent is not None else data
+
+    yield b"{"
+    empty = True
+    for key, value in model_items(bom, by_alias):
+        yield (b"" if empty else item_sep) + newline(1) + to_json(key) + key_sep
+        empty = False
+        if isinstance(value, list) and value:
+            yield b"["
+            for i, item in enumerate(value):
+                yield (item_sep if i else b"") + newline(2) + dump(item, 2)
+            yield newline(1) + b"]"
+        else:
+            yield dump(value, 1)
+    yield b"}" if empty else newline(0) + b"}"
+
+
+def buffered(chunks: Iterable[bytes], size: int = 1 << 16) -> Iterator[bytes]:
+    # joins small chunks into blocks of at least size bytes
+    buffer = []
+    buffer_size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffer_size += len(chunk)
+        if buffer_size >= size:
+            yield b"".join(buffer)
+            buffer = []
+            buffer_size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+
+class RelationshipIndex:
+    # ordered relationship list indexed by (type, sourceID, targetID), by source and by target
+    def __init__(self, relations: Optional[Iterable[middleware.Relationship]] = None) -> None:
+        self._rels = {}
+        self._seq = 0
+        self._keys = {}
+        self._by_source = {}
+        self._by_target = {}
+        if relations:
+            self.extend(relations)
+
+    @staticmethod
+    def key(rel: middleware.Relationship) -> Tuple[str, str, str]:
+        return (rel.type, rel.sourceID, rel.targetID)
+
+    def __len__(self) -> int:
+        return len(self._rels)
+
+    def __iter__(self) -> Iterator[middleware.Relationship]:
+        return iter(list(self._rels.values()))
+
+    def __contains__(self, rel: middleware.Relationship) -> bool:
+        return self.key(rel) in self._keys
+
+    def _link(self, seq: int, rel: middleware.Relationship) -> None:
+        self._keys.setdefault(self.key(rel), {})[seq] = None
+        self._by_source.setdefault(rel.sourceID, {})[seq] = None
+        self._by_target.setdefault(rel.targetID, {})[seq] = None
+
+    def _unlink(self, seq: int, rel: middleware.Relationship) -> None:
+        for index, key in ((self._keys, self.key(rel)), (self._by_source, rel.sourceID), (self._by_target, rel.targetID)):
+            seqs = index[key]
+            del seqs[seq]
+            if not seqs:
+                del index[key]
+
+    def append(self, rel: middleware.Relationship) -> None:
+        self._rels[self._seq] = rel
+        self._link(self._seq, rel)
+        self._seq += 1
+
+    def extend(self, relations: Iterable[middleware.Relationship]) -> None:
+        for rel in relations:
+            self.append(rel)
+
+    def add(self, rel: middleware.Relationship) -> bool:
+        # append the relationship unless an identical one exists, return whether it was appended
+        if rel in self:
+            return False
+        self.append(rel)
+        return True
+
+    def remove(self, rel: middleware.Relationship) -> None:
+        seqs = self._keys.get(self.key(rel), {})
+        if not seqs:
+            raise ValueError(f"Relationship {rel} not found")
+        seq = next((seq for seq in seqs if self._rels[seq] is rel), next(iter(seqs)))
+        self._unlink(seq, self._rels.pop(seq))
+
+    def from_source(self, sourceID: str) -> List[middleware.Relationship]:
+        return [self._rels[seq] for seq in self._by_source.get(sourceID, {})]
+
+    def to_target(self, targetID: str) -> List[middleware.Relationship]:
+        return [self._rels[seq] for seq in self._by_target.get(targetID, {})]
+
+    def rename(self, old_id: str, new_id: str) -> None:
+        # replace a component ID on both ends of every relationship that refers to it
+        if old_id == new_id:
+            return
+        for seq in list(self._by_source.get(old_id, {})) + list(self._by_target.get(old_id, {})):
+            rel = self._rels[seq]
+            if rel.sourceID != old_id and rel.targetID != old_id:
+                continue
+            self._unlink(seq, rel)
+            if rel.sourceID == old_id:
+                rel.sourceID = new_id
+            if rel.targetID == old_id:
+                rel.targetID = new_id
+            self._link(seq, rel)
+
+    def to_list(self) -> List[middleware.Relationship]:
+        return list(self._rels.values())
+
+
+class DepTree:
+    # Util.construct_dep_tree behind the same interface as CSRDepGraph
+    def __init__(self, relations: Optional[List[middleware.Relationship]] = None) -> None:
+        self.root_comp, self.dep_tree = Util.construct_dep_tree(relations)
+
+    def roots(self) -> List[str]:
+        return self.root_comp if self.root_comp else []
+
+    def leaves(self) -> List[str]:
+        nodes = dict.fromkeys(self.roots())
+        for deps in self.dep_tree.values():
+            nodes.update(dict.fromkeys(deps))
+        return [node for node in nodes if not self.dep_tree.get(node)]
+
+    def children(self, comp_id: str) -> List[str]:
+        return self.dep_tree.get(comp_id, [])
+
+    def closure(self, comp_ids: Iterable[str]) -> set:
+        result = set(comp_ids)
+        que = deque(result)
+        while que:
+            for dep in self.dep_tree.get(que.popleft(), []):
+                if dep not in result:
+                    result.add(dep)
+                    que.append(dep)
+        return result
+
+
+class RelationshipGraph:
+    # relationships indexed by position, with forward (by source) and reverse (by target) edge lists per type
+    DEPENDENCY_TYPES = ("DEPENDS_ON", "DEPENDENCY_OF")
+
+    def __init__(self, relations: Optional[Iterable[middleware.Relationship]] = None) -> None:
+        self.relations = list(relations) if relations else []
+        self.forward = {}
+        self.reverse = {}
+        for pos, rel in enumerate(self.relations):
+            self.forward.setdefault(rel.type, {}).setdefault(rel.sourceID, []).append(pos)
+            self.reverse.setdefault(rel.type, {}).setdefault(rel.targetID, []).append(pos)
+        # non-dependency relationships pull the other end into an exported sub-graph
+        self.source2target = [t for t in self.forward if t not in self.DEPENDENCY_TYPES and t in Util.SOURCE2TARGET]
+        self.target2source = [t for t in self.reverse if t not in self.DEPENDENCY_TYPES and t not in Util.SOURCE2TARGET and t in Util.TARGET2SOURCE]
+        self._dep_graph = None
+
+    @property
+    def dep_graph(self):
+        # DepTree or CSRDepGraph of the dependencies, built on the first export and shared by the next ones
+        if self._dep_graph is None:
+            self._dep_graph = Util.dep_graph(self.relations)
+        return self._dep_graph
+
+    def attached(self, node: str) -> Iterator[Tuple[int, str]]:
+        # (position, other end) of the non-dependency relationships that carry node to another component
+        for rel_type in self.source2target:
+            for pos in self.forward[rel_type].get(node, []):
+                yield pos, self.relations[pos].targetID
+        for rel_type in self.target2source:
+            for pos in self.reverse[rel_type].get(node, []):
+                yield pos, self.relations[pos].sourceID
+
+    def export(self, ids: Iterable[str]) -> Tuple[set, List[middleware.Relationship]]:
+        # components reachable from ids through dependencies, plus those attached to them by other
+        # relationships. A relationship only carries a component that was exported before its position
+        # in the list, so joined[node] keeps the position from which a node is part of the sub-graph
+        # (-1 for dependencies), and the result matches a single ordered pass over the relationships.
+        joined = dict.fromkeys(self.dep_graph.closure(ids), -1)
+
+        heap = [(-1, node) for node in joined]
+        while heap:
+            pos, cur = heapq.heappop(heap)
+            if pos > joined[cur]:
+                continue
+            for rel_pos, other in self.attached(cur):
+                if rel_pos > pos and rel_pos < joined.get(other, len(self.relations)):
+                    joined[other] = rel_pos
+                    heapq.heappush(heap, (rel_pos, other))
 
+        exported = []
+        for node, pos in joined.items():
+            for rel_pos, _ in self.attached(node):
+                if rel_pos > pos:
+                    exported.append(rel_pos)
+            for rel_type in self.DEPENDENCY_TYPES:
+                for rel_pos in self.forward.get(rel_type, {}).get(node, []):
+                    target = self.relations[rel_pos].targetID
+                    if rel_pos > pos and target in joined and rel_pos > joined[target]:
+                        exported.append(rel_pos)
+        return set(joined), [self.relations[pos] for pos in sorted(exported)]
@@ -0,0 +1,267 @@
+# CycloneDX conversion of SIT before CONTAINS-nested components were tracked by bom-ref, kept
+# verbatim as the reference the CONTAINS benchmark compares Middleware2Cdx.middleware2cdx with.
+# It takes the converter in place of self, so the component helpers are the current ones
+import re
+from datetime import datetime
+from SIT.output.cdx_conversion import Middleware2Cdx, check_ID
+from SIT.output.middleware import Component, Service, Individual
+from SIT.schema import cdx_model
+
+
+def middleware2cdx(self: Middleware2Cdx) -> dict:
+    bom = cdx_model.CyclonedxBillOfMaterialsStandard(
+        bomFormat=cdx_model.BomFormat.CycloneDX,
+        specVersion="1.6",
+        serialNumber=check_ID(self.midware.doc_ID),
+        version=self.midware.bom_version,
+    )
+    lfc = []
+    if self.midware.lifecycles:
+        for lfcycle in self.midware.lifecycles:
+            if lfcycle in [member.value for member in cdx_model.Phase]:
+                lfc.append(
+                    cdx_model.Lifecycles(
+                        phase=cdx_model.Phase(lfcycle)
+                    )
+                )
+            else:
+                lfc_list = lfcycle.split("; ")
+                lfc_name = lfc_list[0].strip().strip("name: ")
+                if len(lfc_list) > 1:
+                    lfc_description = lfcycle.split("; ")[1].strip().strip("description: ")
+                lfc.append(
+                    cdx_model.Lifecycles1(
+                        name=lfc_name,
+                        description=lfc_description
+                    )
+                )
+
+    manufacturer = None
+    authors = []
+    tools = None
+    if self.midware.creator:
+        cr_comps = []
+        cr_services = []
+        for cr in self.midware.creator:
+            if isinstance(cr, Component):
+                cr_comps.append(
+                    self.component_mid2cdx(cr)
+                )
+            elif isinstance(cr, Service):
+                cr_services.append(
+                    self.service_mid2cdx(cr)
+                )
+            else:
+                ind = self.individual2entity_contact(cr)
+                if isinstance(ind, cdx_model.OrganizationalEntity):
+                    manufacturer = ind
+                else:
+                    authors.append(ind)
+        if cr_comps or cr_services:
+            tools = cdx_model.Tools(
+                components=cr_comps if cr_comps else None,
+                services=cr_services if cr_services else None
+            )
+
+    bom.metadata = cdx_model.Metadata(
+        timestamp=datetime.strptime(self.midware.timestamp, "%Y-%m-%dT%H:%M:%SZ") if self.midware.timestamp else None,
+        lifecycles=lfc if lfc else None,
+        tools=tools if tools else None,
+        manufacturer=manufacturer if manufacturer else None,
+        authors=authors if authors else None,
+        licenses=self.license_mid2cdx(self.midware.licenses),
+    )
+
+    comp_dic = {}
+    bom_comps = []
+    root_component = None
+    if self.midware.components:
+        for comp in self.midware.components:
+            if "root" in comp.ID.lower() and not root_component:
+                root_component = self.component_mid2cdx(comp)
+                comp_dic[root_component.bom_ref.root] = root_component
+                bom.metadata.component = root_component
+                bom.metadata.supplier = root_component.supplier
+                continue
+            cdx_comp = self.component_mid2cdx(comp)
+            if not cdx_comp:
+                continue
+            bom_comps.append(cdx_comp)
+            if cdx_comp.bom_ref:
+                comp_dic[cdx_comp.bom_ref.root] = cdx_comp
+
+    if not root_component:
+        root_component = bom_comps[0]
+        bom.metadata.component = root_component
+        bom.metadata.supplier = root_component.supplier
+        bom_comps.remove(root_component)
+
+    depend_dic = {}
+    dependencies = []
+    properties = []
+    remove_rels = []
+    if self.midware.relationship:
+        for rel in self.midware.relationship:
+            if rel.type == "DEPENDS_ON":
+                dep_comp = depend_dic.get(rel.sourceID, [])
+                if not dep_comp:
+                    depend_dic[rel.sourceID] = dep_comp
+                dep_comp.append(rel.targetID)
+            elif rel.type == "DEPENDENCY_OF":
+                dep_comp = depend_dic.get(rel.targetID, [])
+                if not dep_comp:
+                    depend_dic[rel.targetID] = dep_comp
+                dep_comp.append(rel.sourceID)
+            elif rel.type == "ANCESTOR_OF":
+                source_id = rel.sourceID
+                target_id = rel.targetID
+                source_comp = comp_dic.get(source_id, None)
+                target_comp = comp_dic.get(target_id, None)
+                if not (source_comp and target_comp):
+                    continue
+                if not target_comp.pedigree:
+                    target_comp.pedigree = cdx_model.Pedigree()
+                if not target_comp.pedigree.ancestors:
+                    target_comp.pedigree.ancestors = []
+                target_comp.pedigree.ancestors.append(source_comp)
+            elif rel.type == "DESCENDANT_OF":
+                source_id = rel.sourceID
+                target_id = rel.targetID
+                source_comp = comp_dic.get(source_id, None)
+                target_comp = comp_dic.get(target_id, None)
+                if not (source_comp and target_comp):
+                    continue
+                if not target_comp.pedigree:
+                    target_comp.pedigree = cdx_model.Pedigree()
+                if not target_comp.pedigree.descendants:
+                    target_comp.pedigree.descendants = []
+                target_comp.pedigree.descendants.append(source_comp)
+            elif rel.type == "VARIANT_OF":
+                source_id = rel.sourceID
+                target_id = rel.targetID
+                source_comp = comp_dic.get(source_id, None)
+                target_comp = comp_dic.get(target_id, None)
+                if not (source_comp and target_comp):
+                    continue
+                if not target_comp.pedigree:
+                    target_comp.pedigree = cdx_model.Pedigree()
+                if not target_comp.pedigree.variants:
+                    target_comp.pedigree.variants = []
+                target_comp.pedigree.variants.append(source_comp)
+            elif rel.type == "CONTAINS":
+                source_id = rel.sourceID
+                target_id = rel.targetID
+                source_comp = comp_dic.get(source_id, None)
+                target_comp = comp_dic.get(target_id, None)
+                if not (source_comp and target_comp):
+                    continue
+                if not source_comp.components:
+                    source_comp.components = []
+                source_comp.components.append(target_comp)
+                remove_rels.append(target_comp)
+            else:
+                rel_value = f"{rel.sourceID} is {rel.type} of {rel.targetID}"
+                if rel.comment:
+                    rel_value += f" ({rel.comment})"
+                properties.append(
+                    cdx_model.Property(
+                        name=rel.type,
+                        value=rel_value
+                    )
+                )
+
+    for rel in remove_rels:
+        if rel in bom_comps:
+            bom_comps.remove(rel)
+
+    for source, target in depend_dic.items():
+        dependencies.append(
+            cdx_model.Dependency(
+                ref=cdx_model.RefType(root=source),
+                dependsOn=[cdx_model.RefType(root=dep) for dep in target]
+            )
+        )
+
+    annotations = []
+    if self.midware.annotations:
+        for anno in self.midware.annotations:
+            subjects = []
+            if anno.subjects:
+                pattern=r'^urn:cdx:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/[1-9][0-9]*#.+$'
+                for sub in anno.subjects:
+                    if bool(re.fullmatch(pattern, sub)):
+                        subjects.append(
+                            cdx_model.BomLinkElementType(
+                                root=sub
+                            )
+                        )
+                    else:
+                        subjects.append(
+                            cdx_model.RefLinkType(
+                                root=cdx_model.RefType(root=sub)
+                            )
+                        )
+
+            annotator = None
+            if anno.annotator:
+                for ent in anno.annotator:
+                    if isinstance(ent, Individual):
+                        cdx_ent = self.individual2entity_contact(ent)
+                        if ent.type == "organization":
+                            if not annotator:
+                                annotator = cdx_model.Annotator(
+                                    organization=cdx_ent
+                                )
+                            else:
+                                annotator.organization = cdx_ent
+                        elif ent.type == "person":
+                            if not annotator:
+                                annotator = cdx_model.Annotator1(
+                                    individual=cdx_ent
+                                )
+                            else:
+                                annotator.individual = cdx_ent
+                    elif isinstance(ent, Component):
+                        if not annotator:
+                            annotator = cdx_model.Annotator2(
+                                component=self.component_mid2cdx(ent)
+                            )
+                        else:
+                            annotator.component = self.component_mid2cdx(ent)
+                    elif isinstance(ent, Service):
+                        if not annotator:
+                            annotator = cdx_model.Annotator3(
+                                service=self.service_mid2cdx(ent)
+                            )
+                        else:
+                            annotator.service = self.service_mid2cdx(ent)
+
+            annotations.append(
+                cdx_model.Annotations(
+                    bom_ref=cdx_model.RefType(root=anno.ID) if anno.ID else None,
+                    subjects=subjects if subjects else None,
+                    annotator=annotator,
+                    timestamp=datetime.strptime(anno.timestamp, "%Y-%m-%dT%H:%M:%SZ") if anno.timestamp else None,
+                    text=anno.text,
+                    signature=self.signature_mid2cdx(anno.signature)
+                )
+            )
+
+    if self.midware.license_list_version:
+        properties.append(
+            cdx_model.Property(
+                name="licenseListVersion",
+                value=self.midware.license_list_version
+            )
+        )
+
+    if self.midware.properties:
+        properties.extend(self.property_mid2cdx(self.midware.properties))
+
+    bom.components = bom_comps if bom_comps else None
+    bom.externalReferences = self.exRef_mid2cdx(self.midware.external_references)
+    bom.dependencies = dependencies if dependencies else None
+    bom.annotations = annotations if annotations else None
+    bom.properties = properties if properties else None
+    bom.signature = self.signature_mid2cdx(self.midware.signature)
+    return bom.model_dump(mode='json', by_alias=True, exclude_none=True)
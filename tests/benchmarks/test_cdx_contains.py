@@ -0,0 +1,36 @@
+import os
+import time
+import warnings
+import pytest
+from synthetic import bench_sizes, synthetic_middleware
+from reference_cdx import middleware2cdx as reference_middleware2cdx
+from SIT.output import middleware
+from SIT.output.cdx_conversion import Middleware2Cdx
+
+
+# the reference removal loop compares whole component trees and is quadratic, 1000 packages
+# already take it about 13s, so larger inputs are only timed
+REFERENCE_MAX = int(os.environ.get("SIT_BENCH_REFERENCE_MAX", "1000"))
+
+
+def run_conversion(convert, bom: dict) -> tuple:
+    converter = Middleware2Cdx(middleware.Middleware.model_validate(bom))
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        cdx_bom = convert(converter)
+    return cdx_bom, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("n", bench_sizes("500"))
+def test_cdx_contains(n):
+    # every package CONTAINS a source file, which is nested into it in the CycloneDX output
+    bom = synthetic_middleware(n, 1, file_ratio=1.0)
+    cdx_bom, elapsed = run_conversion(Middleware2Cdx.middleware2cdx, bom)
+    print(f"CycloneDX conversion of {n} packages with {n - 1} CONTAINS: {elapsed:.3f}s")
+    assert len(cdx_bom["components"]) == n - 1
+    assert all(len(comp["components"]) == 1 for comp in cdx_bom["components"])
+    if n <= REFERENCE_MAX:
+        expected, reference_elapsed = run_conversion(reference_middleware2cdx, bom)
+        print(f"reference conversion: {reference_elapsed:.3f}s")
+        assert cdx_bom == expected
@@ -0,0 +1,87 @@
+import os
+import random
+import time
+import pytest
+from synthetic import bench_sizes
+from SIT.tool.generate import analyze_sbom
+from SIT.tool.generate.meta import scan_cache
+
+
+# the reference scan goes over every distribution for every import, larger environments are only timed
+REFERENCE_MAX = int(os.environ.get("SIT_BENCH_REFERENCE_MAX", "2000"))
+
+
+def synthetic_env(root: str, n: int, seed: int, imports_per_module: int = 16) -> str:
+    # virtual environment with n distributions, dist<i> installs the package pkg<i>, every fifth one
+    # also a module of the shared namespace package "common". Each pkg<i> imports random other
+    # packages, some of them conditionally. setuptools and pip are installed as well
+    rnd = random.Random(seed)
+    site_packages = os.path.join(root, "lib", "python3", "site-packages")
+    os.makedirs(os.path.join(site_packages, "common"))
+    for tool in ("pip", "setuptools"):
+        dist_info = os.path.join(site_packages, f"{tool}-1.0.dist-info")
+        os.makedirs(os.path.join(site_packages, tool))
+        os.mkdir(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: {tool}\nVersion: 1.0\nLicense: MIT\n")
+        with open(os.path.join(dist_info, "RECORD"), "w") as f:
+            f.write(f"{tool}/__init__.py,sha256=x,10\n")
+        with open(os.path.join(site_packages, tool, "__init__.py"), "w") as f:
+            f.write("import os\n")
+    for i in range(n):
+        dist_info = os.path.join(site_packages, f"dist{i}-1.0.dist-info")
+        os.mkdir(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: dist{i}\nVersion: 1.0\nSummary: synthetic {i}\nLicense: MIT\n")
+        record = [f"pkg{i}/__init__.py,sha256=x,10"]
+        if i % 5 == 0:
+            record.append(f"common/part{i}.py,sha256=x,10")
+            with open(os.path.join(site_packages, "common", f"part{i}.py"), "w") as f:
+                f.write("import os\n")
+        record.append(f"dist{i}-1.0.dist-info/METADATA,,")
+        with open(os.path.join(dist_info, "RECORD"), "w") as f:
+            f.write("\n".join(record) + "\n")
+        lines = []
+        for j in rnd.sample(range(n), min(imports_per_module, n)):
+            if j == i:
+                continue
+            if rnd.random() < 0.1:
+                lines.append(f"try:\n    import pkg{j}\nexcept ImportError:\n    pass")
+            else:
+                lines.append(f"import pkg{j}")
+        lines.append("import common")
+        if i % 7 == 0:
+            lines.append("import setuptools\nimport setup")
+        os.mkdir(os.path.join(site_packages, f"pkg{i}"))
+        with open(os.path.join(site_packages, f"pkg{i}", "__init__.py"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+    return root
+
+
+def scan_providers(pkg2import: dict, dep_import: str) -> list:
+    # lookup build_bom did before the inverted index: a scan over all the distributions
+    return [pkg_name for pkg_name, imports in pkg2import.items() if dep_import in imports]
+
+
+@pytest.mark.parametrize("n", bench_sizes("200"))
+def test_env_imports(n, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_cache, "scan_cache", None)
+    env = synthetic_env(str(tmp_path / "venv"), n, 1)
+    start = time.perf_counter()
+    pkg_metas, pkg2import, import2pkg = analyze_sbom.analyze_env(env)
+    print(f"analyze_env of {n} distributions: {time.perf_counter() - start:.3f}s")
+    assert len(pkg2import) == n + 2
+    assert len(import2pkg["common"]) == (n + 4) // 5
+    # setuptools and pip provide only their own top-level package, like any other distribution
+    assert pkg2import["setuptools"] == {"setuptools"} and pkg2import["pip"] == {"pip"}
+    assert import2pkg["setuptools"] == ["setuptools"] and "setup" not in import2pkg
+    dep_imports = [dep_import for pkg in pkg_metas for dep_import in pkg["dependson"].get("all_depends", [])]
+    assert len(dep_imports) > n
+    start = time.perf_counter()
+    providers = [import2pkg.get(dep_import, []) for dep_import in dep_imports]
+    print(f"index lookup of {len(dep_imports)} imports: {time.perf_counter() - start:.3f}s")
+    if n <= REFERENCE_MAX:
+        start = time.perf_counter()
+        expected = [scan_providers(pkg2import, dep_import) for dep_import in dep_imports]
+        print(f"reference scan: {time.perf_counter() - start:.3f}s")
+        assert providers == expected
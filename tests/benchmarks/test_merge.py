@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+import re
+import time
+import warnings
+import pytest
+from synthetic import bench_sizes, synthetic_middleware
+from reference_merge import merge_midware as reference_merge_midware
+from SIT.output import middleware
+from SIT.tool.merge.merge_sbom import Merge_SBOM
+from SIT.tool.util.utils import Util
+
+
+# the reference algorithm is quadratic, larger inputs are only timed
+REFERENCE_MAX = int(os.environ.get("SIT_BENCH_REFERENCE_MAX", "10000"))
+
+
+def sub_middleware(n: int, seed: int) -> dict:
+    # sub-SBOM of n // 10 packages rooted at package n // 7 of the root document. Most of its
+    # packages exist in the root under the same name, every third one in another version (so with
+    # another ID) and every seventh one is new
+    offset = n // 7
+
+    def rename(match: re.Match) -> str:
+        i = int(match.group(1))
+        name = f"new{i}" if i % 7 == 3 else f"c{offset + i}"
+        return f"{name}@2.0" if i % 3 == 1 else f"{name}@1.0"
+
+    bom = synthetic_middleware(max(n // 10, 5), seed, prefix="s")
+    for comp in bom["components"]:
+        if comp["type"] == "Package: LIBRARY":
+            comp["ID"] = re.sub(r"s(\d+)@1\.0", rename, comp["ID"])
+            comp["name"], comp["version"] = comp["ID"][len("pkg:pypi/"):].split("@")
+    for rel in bom["relationship"]:
+        rel["sourceID"] = re.sub(r"s(\d+)@1\.0", rename, rel["sourceID"])
+        rel["targetID"] = re.sub(r"s(\d+)@1\.0", rename, rel["targetID"])
+    return bom
+
+
+def merged_dump(midware: middleware.Middleware) -> dict:
+    # doc_ID and timestamp are new on every merge
+    return midware.model_dump(mode="json", exclude_none=True, exclude={"doc_ID", "timestamp"})
+
+
+def run_merge(merge, root: dict, sub: dict) -> tuple:
+    root_midware = middleware.Middleware.model_validate(copy.deepcopy(root))
+    sub_midware = middleware.Middleware.model_validate(copy.deepcopy(sub))
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        merged = merge(root_midware, sub_midware)
+    return merged_dump(merged), time.perf_counter() - start
+
+
+@pytest.mark.parametrize("csr", [False, True], ids=["dict", "csr"])
+@pytest.mark.parametrize("n", bench_sizes("1000"))
+def test_merge(n, csr, monkeypatch):
+    if csr:
+        # the CSR graph is only used from CSR_MIN_RELATIONS relationships on
+        dep_graph = Util.dep_graph
+        monkeypatch.setattr(Util, "dep_graph", staticmethod(lambda relations, min_csr_size=0: dep_graph(relations, 0)))
+    root = synthetic_middleware(n, 1)
+    sub = sub_middleware(n, 2)
+    merged, elapsed = run_merge(Merge_SBOM([]).merge_midware, root, sub)
+    print(f"merge of {n} + {max(n // 10, 5)} packages: {elapsed:.3f}s")
+    assert len(merged["components"]) > n // 2
+    if n <= REFERENCE_MAX:
+        expected, reference_elapsed = run_merge(reference_merge_midware, root, sub)
+        print(f"reference merge: {reference_elapsed:.3f}s")
+        assert merged == expected
+
+
+
+
+@pytest.mark.parametrize("n", bench_sizes("1000"))
+def test_merge_many(n, tmp_path):
+    # merge_midwares indexes the root once for all the sub-SBOMs, the result is the one of chained
+    # merge_midware calls, which index the whole merged document again for every sub-SBOM
+    boms = [synthetic_middleware(n, 1)] + [sub_middleware(n, seed) for seed in range(2, 6)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        midwares = [middleware.Middleware.model_validate(copy.deepcopy(bom)) for bom in boms]
+        start = time.perf_counter()
+        chained = midwares[0]
+        for sub_midware in midwares[1:]:
+            chained = Merge_SBOM([]).merge_midware(chained, sub_midware)
+        chained_elapsed = time.perf_counter() - start
+        midwares = [middleware.Middleware.model_validate(copy.deepcopy(bom)) for bom in boms]
+        start = time.perf_counter()
+        merged = Merge_SBOM([]).merge_midwares(midwares)
+        elapsed = time.perf_counter() - start
+    print(f"merge of {n} + {len(boms) - 1} x {max(n // 10, 5)} packages: {elapsed:.3f}s, chained merges: {chained_elapsed:.3f}s")
+    assert merged_dump(merged) == merged_dump(chained)
+
+    # merge_sbom loads the inputs and merges them the same way
+    paths = []
+    for i, bom in enumerate(boms):
+        path = tmp_path / f"sbom{i}.json"
+        path.write_text(json.dumps(bom))
+        paths.append(str(path))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert merged_dump(Merge_SBOM(paths).merge_sbom()) == merged_dump(chained)
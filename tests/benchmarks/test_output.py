@@ -0,0 +1,32 @@
+import time
+import pytest
+from synthetic import bench_sizes, synthetic_middleware
+from SIT.output import middleware
+from SIT.tool.util.utils import Util
+
+
+@pytest.fixture(scope="module", params=bench_sizes("1000"))
+def midware(request) -> middleware.Middleware:
+    return middleware.Middleware.model_validate(synthetic_middleware(request.param, 4))
+
+
+def timed_output(midware: middleware.Middleware, model: str, output: str, legacy_json: bool) -> tuple:
+    start = time.perf_counter()
+    bom_hash = Util.make_output(midware, model, output, 4, legacy_json=legacy_json)
+    return bom_hash, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("model", ["cyclonedx", "spdx", "ossbom", "middleware"])
+def test_output(midware, model, tmp_path):
+    # the synthetic documents are ASCII only, so the json module (--legacy-json) and pydantic-core
+    # write the same bytes
+    # the converter modules and their lookup tables are loaded outside the timed runs
+    Util.convert2model(middleware.Middleware.model_validate(synthetic_middleware(10, 4)), model)
+    legacy = tmp_path / "legacy.json"
+    output = tmp_path / "sbom.json"
+    legacy_hash, legacy_elapsed = timed_output(midware, model, str(legacy), True)
+    bom_hash, elapsed = timed_output(midware, model, str(output), False)
+    print(f"{model} output of {len(midware.components)} components: {elapsed:.3f}s, legacy json: {legacy_elapsed:.3f}s")
+    assert output.read_bytes() == legacy.read_bytes()
+    assert bom_hash == legacy_hash
+    assert (tmp_path / "sbom.json.sha256").read_text() == (tmp_path / "legacy.json.sha256").read_text()
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from synthetic import synthetic_middleware
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# CI hooks run SIT thousands of times a day, converting a small SBOM has to stay well under a second
+STARTUP_LIMIT = float(os.environ.get("SIT_BENCH_STARTUP_LIMIT", "1.0"))
+HEAVY_MODULES = ["pandas", "scancode", "requests", "pkg_resources", "SIT.tool.generate"]
+
+
+def run_sit(*args: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "SIT", *args], cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def test_convert_startup(tmp_path):
+    input_path = tmp_path / "small.json"
+    input_path.write_text(json.dumps(synthetic_middleware(20, 1)))
+    args = ["convert", "-i", str(input_path), "--model", "cyclonedx", "-o", str(tmp_path / "out.json")]
+    elapsed = min(run_sit(*args) for _ in range(3))
+    print(f"convert of a 20 component SBOM: {elapsed:.3f}s")
+    assert elapsed < STARTUP_LIMIT
+
+
+def test_convert_imports(tmp_path):
+    # the modules of the other subcommands and the generate-only dependencies are never imported
+    input_path = tmp_path / "small.json"
+    input_path.write_text(json.dumps(synthetic_middleware(20, 1)))
+    script = (
+        "import runpy, sys\n"
+        f"sys.argv = ['SIT', 'convert', '-i', {str(input_path)!r}, '--model', 'cyclonedx', '-o', {str(tmp_path / 'out.json')!r}]\n"
+        "runpy.run_module('SIT', run_name='__main__', alter_sys=True)\n"
+        f"print(sorted(m for m in sys.modules if any(m == h or m.startswith(h + '.') for h in {HEAVY_MODULES!r})))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,52 @@
+import os
+import random
+from typing import List
+
+
+def bench_sizes(default: str) -> List[int]:
+    # SIT_BENCH_SIZES=1000,10000,100000 runs the benchmarks at full size, the defaults keep the test run short
+    return [int(size) for size in os.environ.get("SIT_BENCH_SIZES", default).split(",") if size.strip()]
+
+
+def synthetic_middleware(n: int, seed: int, prefix: str = "c", file_ratio: float = 0.1) -> dict:
+    # middleware document with n packages in a random dependency DAG (some of the edges as
+    # DEPENDENCY_OF), about n * file_ratio source files CONTAINed by the packages
+    rnd = random.Random(seed)
+    components = []
+    ids = []
+    for i in range(n):
+        comp_id = f"pkg:pypi/{prefix}{i}@1.0"
+        ids.append(comp_id)
+        components.append({"type": "Package: LIBRARY", "name": f"{prefix}{i}", "version": "1.0", "ID": comp_id})
+    relationship = []
+    for i in range(1, n):
+        parent = ids[rnd.randrange(0, i)]
+        if rnd.random() < 1 / 6:
+            relationship.append({"type": "DEPENDENCY_OF", "sourceID": ids[i], "targetID": parent})
+        else:
+            relationship.append({"type": "DEPENDS_ON", "sourceID": parent, "targetID": ids[i]})
+        other = ids[rnd.randrange(0, i)]
+        if rnd.random() < 0.3 and other != parent:
+            relationship.append({"type": "DEPENDS_ON", "sourceID": other, "targetID": ids[i]})
+        if rnd.random() < file_ratio:
+            file_id = f"urn:uuid:00000000-0000-0000-0000-{seed:04d}{i:08d}"
+            components.append({
+                "type": "File: SOURCE",
+                "name": f"/src/{prefix}{i}.py",
+                "ID": file_id,
+                "checksum": [{"alg": "SHA256", "value": "ab" * 32}],
+            })
+            relationship.append({"type": "CONTAINS", "sourceID": ids[i], "targetID": file_id})
+    return {
+        "type": "Middleware",
+        "bom_version": 1,
+        "doc_ID": f"urn:uuid:{seed:08d}-0000-0000-0000-000000000000",
+        "doc_name": f"doc{seed}",
+        "doc_namespace": "https://example.com",
+        "license_list_version": "3.23",
+        "timestamp": "2024-01-01T00:00:00Z",
+        "licenses": [{"type": "declared", "spdxID": "CC0-1.0"}],
+        "creator": [{"type": "person", "name": "SIT"}],
+        "components": components,
+        "relationship": relationship,
+    }
@@ -0,0 +1,19 @@
+import json
+import os
+import subprocess
+import sys
+
+
+def test_scan_bom_non_ascii(tmp_path):
+    # scan_bom decodes UTF-8 whatever the locale, here an ASCII one with UTF-8 mode off
+    path = tmp_path / "bom.json"
+    bom = {"bomFormat": "CycloneDX", "components": [{"name": "Zoë ñ 中文"}]}
+    path.write_text(json.dumps(bom, ensure_ascii=False), encoding="utf-8")
+    script = (
+        "import sys; from SIT.tool.util.bom_reader import scan_bom; "
+        "print(ascii(list(scan_bom(sys.argv[1])['components'])))"
+    )
+    env = dict(os.environ, LC_ALL="C", PYTHONCOERCECLOCALE="0", PYTHONUTF8="0")
+    env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env.get("PYTHONPATH", "")])
+    out = subprocess.run([sys.executable, "-c", script, str(path)], env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ascii(bom["components"])
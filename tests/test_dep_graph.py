@@ -0,0 +1,34 @@
+import random
+import pytest
+from synthetic import synthetic_middleware
+from SIT.output import middleware
+from SIT.tool.util.dep_graph import CSRDepGraph
+from SIT.tool.util.utils import Util, DepTree, RelationshipGraph
+
+
+@pytest.fixture(scope="module")
+def relations() -> list:
+    return middleware.Middleware.model_validate(synthetic_middleware(500, 7, file_ratio=0.3)).relationship
+
+
+def test_csr_dep_graph(relations):
+    tree, csr = DepTree(relations), CSRDepGraph(relations)
+    assert csr.roots() == tree.roots()
+    assert sorted(csr.leaves()) == sorted(tree.leaves())
+    for rel in relations[:100]:
+        assert csr.children(rel.sourceID) == tree.children(rel.sourceID)
+
+
+def test_csr_export(relations, monkeypatch):
+    # exports through the CSR backend, which SBOMs only reach from CSR_MIN_RELATIONS relationships on
+    rnd = random.Random(7)
+    id_sets = [[rel.sourceID] for rel in rnd.sample(relations, 20)]
+    id_sets.append([rel.targetID for rel in rnd.sample(relations, 10)])
+    tree_graph = RelationshipGraph(relations)
+    assert isinstance(tree_graph.dep_graph, DepTree)
+    expected = [tree_graph.export(ids) for ids in id_sets]
+    dep_graph = Util.dep_graph
+    monkeypatch.setattr(Util, "dep_graph", staticmethod(lambda relations, min_csr_size=0: dep_graph(relations, 0)))
+    csr_graph = RelationshipGraph(relations)
+    assert isinstance(csr_graph.dep_graph, CSRDepGraph)
+    assert [csr_graph.export(ids) for ids in id_sets] == expected
@@ -0,0 +1,21 @@
+from SIT.output import middleware
+from SIT.tool.generate.meta import parse_pyfile, scan_cache
+
+
+def test_reuse_file_without_license(tmp_path, monkeypatch):
+    # mentions "license" but carries no detectable license, so the scan result is empty
+    path = tmp_path / "mod.py"
+    path.write_text("def f():\n    # see the license section of the docs\n    return 1\n")
+    monkeypatch.setattr(scan_cache, "scan_cache", None)
+    comps = parse_pyfile.analyze_pyfile_meta(str(path))
+    assert comps and comps[0].type == "File: SOURCE" and not comps[0].licenses
+
+    previous = parse_pyfile.index_pyfile_meta(middleware.Middleware.model_construct(components=comps))
+    def scan(*args, **kwargs):
+        raise AssertionError("unchanged file was scanned again")
+    monkeypatch.setattr(parse_pyfile, "scan_licenses", scan)
+    assert parse_pyfile.reuse_pyfile_meta(str(path), previous[str(path)]) is previous[str(path)]
+
+    path.write_text("def f():\n    # see the license section of the docs\n    return 2\n")
+    monkeypatch.setattr(parse_pyfile, "scan_licenses", lambda *args, **kwargs: {})
+    assert parse_pyfile.reuse_pyfile_meta(str(path), previous[str(path)]) is not previous[str(path)]
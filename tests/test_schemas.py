@@ -0,0 +1,50 @@
+import json
+import os
+import pytest
+from jsonschema import validators
+from referencing import Registry, Resource
+from synthetic import synthetic_middleware
+from SIT.output import middleware
+from SIT.tool.util.utils import Util
+
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SIT", "schema")
+SCHEMAS = {
+    "cyclonedx": ("cdx_model", "bom-1.6.schema.json"),
+    "spdx": ("spdx_model", "spdx-schema.json"),
+    "ossbom": ("ossbom_model", "ossbom.schema.json"),
+}
+
+
+def load_schema(model_dir: str, name: str) -> dict:
+    with open(os.path.join(SCHEMA_DIR, model_dir, name), "r") as f:
+        return json.load(f)
+
+
+def schema_validator(model: str):
+    # bom-1.6 refers to spdx.schema.json and jsf-0.82.schema.json by their $id
+    registry = Registry()
+    for name in ("spdx.schema.json", "jsf-0.82.schema.json"):
+        schema = load_schema("cdx_model", name)
+        registry = registry.with_resource(schema["$id"], Resource.from_contents(schema))
+    schema = load_schema(*SCHEMAS[model])
+    return validators.validator_for(schema)(schema, registry=registry)
+
+
+@pytest.fixture(scope="module")
+def midware() -> middleware.Middleware:
+    bom = synthetic_middleware(200, 3)
+    for i, comp in enumerate(bom["components"]):
+        if comp["type"] == "Package: LIBRARY" and i % 4 == 0:
+            comp["licenses"] = [{"type": "declared", "spdxID": "MIT"}]
+            comp["originator"] = [{"type": "person", "name": f"author{i}", "email": f"author{i}@example.com"}]
+            comp["purl"] = comp["ID"]
+            comp["homepage"] = f"https://example.com/{comp['name']}"
+    return middleware.Middleware.model_validate(bom)
+
+
+@pytest.mark.parametrize("model", sorted(SCHEMAS))
+def test_output_validates_against_schema(midware, model):
+    out_bom = Util.convert2model(midware, model)
+    errors = [error.message for error in schema_validator(model).iter_errors(out_bom)]
+    assert errors == []
@@ -0,0 +1,33 @@
+import json
+import pytest
+from synthetic import synthetic_middleware
+from SIT.output import middleware
+from SIT.tool.util.utils import Util
+
+
+@pytest.fixture(scope="module")
+def midware() -> middleware.Middleware:
+    bom = synthetic_middleware(100, 5)
+    bom["doc_name"] = "dóc 名前"
+    bom["components"][1]["name"] = "pkg-ünïcødé"
+    return middleware.Middleware.model_validate(bom)
+
+
+@pytest.mark.parametrize("indent", [4, None])
+@pytest.mark.parametrize("model", ["cyclonedx", "spdx", "ossbom", "middleware"])
+def test_streamed_output(midware, model, indent, tmp_path):
+    # the streamed writer produces the bytes of the whole-document serialization, and hashes them
+    output = tmp_path / "sbom.json"
+    bom_hash = Util.make_output(midware, model, str(output), indent)
+    assert output.read_bytes() == Util.serialize_model(midware, model, indent)
+    assert (tmp_path / "sbom.json.sha256").read_text() == f"sha256: {bom_hash}"
+
+
+@pytest.mark.parametrize("indent", [4, None])
+@pytest.mark.parametrize("model", ["cyclonedx", "spdx", "ossbom", "middleware"])
+def test_streamed_legacy_output(midware, model, indent, tmp_path):
+    output = tmp_path / "sbom.json"
+    Util.make_output(midware, model, str(output), indent, legacy_json=True)
+    separators = (",", ": ") if indent is not None else (",", ":")
+    expected = json.dumps(Util.convert2model(midware, model), indent=indent, separators=separators)
+    assert output.read_text() == expected